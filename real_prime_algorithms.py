@@ -6,44 +6,2266 @@ This file contains ACTUAL working algorithms for prime-related computations.
 No fiction, just real mathematics.
 """
 
+import decimal
+import json
 import math
+import mmap
+import multiprocessing
+import operator
+import os
 import random
-from typing import List, Tuple, Optional, Dict
-from collections import defaultdict
+import struct
+import sys
+import time
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict, defaultdict, deque
+from collections.abc import Sequence
+from concurrent.futures import (Executor, ProcessPoolExecutor, as_completed,
+                                wait, FIRST_COMPLETED)
+from functools import lru_cache
+from itertools import accumulate, compress, islice
+from typing import List, Tuple, Optional, Dict, Iterator, Iterable, Callable
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python paths always work
+    np = None
+
+
+# Odd numbers per sieve window. One byte per odd number, so 2^15 keeps a
+# window inside a typical 32 KB L1 data cache while covering 65536 integers.
+SEGMENT_SIZE = 1 << 15
+
+# Translation tables between 0/1 flag bytes and ASCII binary digits, used to
+# pack sieve windows into bits (and back) at C speed via int(..., 2).
+_FLAGS_TO_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+_DIGITS_TO_FLAGS = bytes.maketrans(b'01', b'\x00\x01')
+
+
+def _odd_segment_flags(lo: int, hi: int, base_primes: List[int]) -> bytearray:
+    """
+    Sieve the odd numbers in [lo, hi) with the given odd base primes.
+    Byte i of the result is 1 when lo' + 2i is prime, where lo' = lo | 1.
+    base_primes must contain every odd prime up to sqrt(hi - 1).
+    """
+    first = lo | 1
+    size = (hi - first + 1) // 2 if hi > first else 0
+    flags = bytearray(b'\x01') * size
+    if size == 0:
+        return flags
+    if first == 1:
+        flags[0] = 0
+
+    for p in base_primes:
+        square = p * p
+        if square >= hi:
+            break
+        if square >= first:
+            start = square
+        else:
+            # First odd multiple of p that is >= first
+            start = -(-first // p) * p
+            if start % 2 == 0:
+                start += p
+        index = (start - first) // 2
+        if index < size:
+            flags[index::p] = bytes((size - 1 - index) // p + 1)
+
+    return flags
+
+
+def _odd_primes_upto(n: int) -> List[int]:
+    """Odd primes up to n, for use as sieve base primes."""
+    if n < 9:
+        return [p for p in (3, 5, 7) if p <= n]
+    flags = _odd_segment_flags(0, n + 1, _odd_primes_upto(math.isqrt(n)))
+    return list(compress(range(1, n + 1, 2), flags))
+
+
+def _pack_flags(flags: bytearray) -> bytes:
+    """Pack 0/1 flag bytes into bits, little-endian: bit i is flags[i]."""
+    if not flags:
+        return b''
+    value = int(flags.translate(_FLAGS_TO_DIGITS)[::-1], 2)
+    return value.to_bytes((len(flags) + 7) // 8, 'little')
+
+
+def _unpack_bits(data: bytes, nbits: int) -> bytes:
+    """Inverse of _pack_flags: one 0/1 byte for each of the first nbits bits."""
+    if nbits <= 0:
+        return b''
+    value = int.from_bytes(data, 'little')
+    digits = format(value, '0%db' % (8 * len(data)))[::-1][:nbits]
+    return digits.encode('ascii').translate(_DIGITS_TO_FLAGS)
+
+
+def _segment_primes(lo: int, hi: int, base_primes: List[int]) -> List[int]:
+    """Primes in [lo, hi) using odd base primes up to sqrt(hi - 1)."""
+    flags = _odd_segment_flags(lo, hi, base_primes)
+    primes = list(compress(range(lo | 1, hi, 2), flags))
+    if lo <= 2 < hi:
+        primes.insert(0, 2)
+    return primes
+
+
+# Primes used to reject most composites before any modular exponentiation
+_SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47,
+                 53, 59, 61, 67, 71, 73, 79, 83, 89, 97)
+
+# (bound, bases): Miller-Rabin with these bases is exact for all n < bound.
+# Sets from Jaeschke (1993), Zhang & Tang, and Sinclair (2011) for 2^64.
+_MR_WITNESSES = (
+    (2047, (2,)),
+    (1373653, (2, 3)),
+    (9080191, (31, 73)),
+    (25326001, (2, 3, 5)),
+    (4759123141, (2, 7, 61)),
+    (1122004669633, (2, 13, 23, 1662803)),
+    (2152302898747, (2, 3, 5, 7, 11)),
+    (3474749660383, (2, 3, 5, 7, 11, 13)),
+    (341550071728321, (2, 3, 5, 7, 11, 13, 17)),
+    (1 << 64, (2, 325, 9375, 28178, 450775, 9780504, 1795265022)),
+)
+
+
+def _strong_probable_prime(n: int, a: int) -> bool:
+    """Strong Fermat (Miller-Rabin) test of odd n > 2 to base a."""
+    a %= n
+    if a == 0:
+        return True
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        r += 1
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for _ in range(r - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+
+def _jacobi(a: int, n: int) -> int:
+    """Jacobi symbol (a/n) for odd n > 0."""
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def _strong_lucas_probable_prime(n: int) -> bool:
+    """
+    Strong Lucas probable-prime test of odd n > 2 with Selfridge's
+    parameters (first D in 5, -7, 9, -11, ... with (D/n) = -1; P = 1).
+    """
+    if math.isqrt(n) ** 2 == n:
+        return False
+    D = 5
+    while True:
+        j = _jacobi(D, n)
+        if j == -1:
+            break
+        if j == 0 and abs(D) != n:
+            return False
+        D = -D - 2 if D > 0 else -D + 2
+    P, Q = 1, (1 - D) // 4
+    
+    # n + 1 = d * 2^s with d odd
+    d, s = n + 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+        
+    # Left-to-right binary chain for U_d, V_d and Q^d
+    U, V, Qk = 1, P, Q % n
+    for bit in bin(d)[3:]:
+        U, V = U * V % n, (V * V - 2 * Qk) % n
+        Qk = Qk * Qk % n
+        if bit == '1':
+            U, V = (P * U + V) % n, (D * U + P * V) % n
+            if U & 1:
+                U += n
+            if V & 1:
+                V += n
+            U, V = U >> 1, V >> 1
+            Qk = Qk * Q % n
+            
+    if U == 0 or V == 0:
+        return True
+    for _ in range(s - 1):
+        V = (V * V - 2 * Qk) % n
+        if V == 0:
+            return True
+        Qk = Qk * Qk % n
+    return False
+
+
+# Prime table for the trial-division tier of factor_complete
+TRIAL_DIVISION_LIMIT = 1 << 12
+_TRIAL_PRIMES = [2] + _odd_primes_upto(TRIAL_DIVISION_LIMIT)
+
+
+def _is_prime(n: int) -> bool:
+    """
+    Deterministic primality test: trial division by small primes, then
+    Miller-Rabin with a proven witness set for n < 2^64, then Baillie-PSW.
+    """
+    if n < 2:
+        return False
+    for p in _SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+    if n < 101 * 101:
+        return True
+        
+    for bound, bases in _MR_WITNESSES:
+        if n < bound:
+            return all(_strong_probable_prime(n, a) for a in bases)
+            
+    return _strong_probable_prime(n, 2) and _strong_lucas_probable_prime(n)
+
+
+def _mulhi64(a: 'np.ndarray', b: 'np.ndarray') -> 'np.ndarray':
+    """High 64 bits of the 128-bit products a * b for uint64 arrays."""
+    mask, shift = np.uint64(0xFFFFFFFF), np.uint64(32)
+    a0, a1 = a & mask, a >> shift
+    b0, b1 = b & mask, b >> shift
+    p00, p01, p10 = a0 * b0, a0 * b1, a1 * b0
+    mid = (p00 >> shift) + (p01 & mask) + (p10 & mask)
+    return a1 * b1 + (p01 >> shift) + (p10 >> shift) + (mid >> shift)
+
+
+def _mont_mul(a: 'np.ndarray', b: 'np.ndarray', n: 'np.ndarray',
+              n_neg_inv: 'np.ndarray') -> 'np.ndarray':
+    """Montgomery product a * b / 2^64 mod n, elementwise, for odd n < 2^63."""
+    low = a * b
+    m = low * n_neg_inv
+    # low + lo(m * n) is 0 mod 2^64 by construction; it carries unless low == 0
+    result = _mulhi64(a, b) + _mulhi64(m, n) + (low != 0).astype(np.uint64)
+    return np.where(result >= n, result - n, result)
+
+
+def _strong_probable_prime_batch(n: 'np.ndarray', base: int) -> 'np.ndarray':
+    """
+    Vectorized strong-probable-prime test of odd uint64 n < 2^63 to one
+    base, computed in Montgomery form. Returns a boolean mask.
+    """
+    one_bit = np.uint64(1)
+    
+    # -n^-1 mod 2^64 by Newton iteration (n * n = 1 mod 8 gives 3 bits)
+    inverse = n.copy()
+    for _ in range(5):
+        inverse *= np.uint64(2) - n * inverse
+    n_neg_inv = np.uint64(0) - inverse
+    
+    # R = 2^64 mod n, then R^2 mod n by 64 modular doublings
+    r1 = (np.uint64(0) - n) % n
+    r2 = r1.copy()
+    for _ in range(64):
+        r2 = r2 + r2
+        r2 = np.where(r2 >= n, r2 - n, r2)
+    minus_one = n - r1
+    
+    # n - 1 = d * 2^r with d odd
+    d = n - one_bit
+    r = np.zeros(n.shape, dtype=np.int64)
+    for _ in range(63):
+        even = (d & one_bit) == 0
+        if not even.any():
+            break
+        d = np.where(even, d >> one_bit, d)
+        r += even
+        
+    a = np.uint64(base) % n
+    a_mont = _mont_mul(a, r2, n, n_neg_inv)
+    x = r1.copy()
+    for bit in range(int(d.max()).bit_length() - 1, -1, -1):
+        x = _mont_mul(x, x, n, n_neg_inv)
+        use = ((d >> np.uint64(bit)) & one_bit).astype(np.bool_)
+        if use.any():
+            x = np.where(use, _mont_mul(x, a_mont, n, n_neg_inv), x)
+            
+    passed = (a == 0) | (x == r1) | (x == minus_one)
+    for i in range(1, int(r.max())):
+        x = _mont_mul(x, x, n, n_neg_inv)
+        passed |= (x == minus_one) & (i < r)
+    return passed
+
+
+def _miller_rabin_batch(n: 'np.ndarray', bases: Tuple[int, ...]) -> 'np.ndarray':
+    """Vectorized Miller-Rabin over several bases; each base only sees survivors."""
+    passed = np.ones(n.shape, dtype=np.bool_)
+    for base in bases:
+        alive = np.flatnonzero(passed)
+        if len(alive) == 0:
+            break
+        passed[alive] = _strong_probable_prime_batch(n[alive], base)
+    return passed
+
+
+@lru_cache(maxsize=8)
+def _primes_upto_cached(limit: int) -> Tuple[int, ...]:
+    """Primes up to limit, memoized for the factoring stages that reuse them."""
+    return (2,) + tuple(_odd_primes_upto(limit)) if limit >= 2 else ()
+
+
+def _prime_power_upto(p: int, bound: int) -> int:
+    """Largest power of p that is <= bound (integer arithmetic, no log rounding)."""
+    q = p
+    while q * p <= bound:
+        q *= p
+    return q
+
+
+@lru_cache(maxsize=8)
+def _ecm_stage1_multipliers(B1: int, primes_per_chunk: int = 2048) -> Tuple[int, ...]:
+    """
+    The ECM stage-1 scalar, the product of every prime power <= B1, split
+    into chunks so a curve can check for cancellation between ladders.
+    Memoized because building it is quadratic in B1 and every curve of a
+    level shares it.
+    """
+    primes = _primes_upto_cached(B1)
+    return tuple(math.prod(_prime_power_upto(p, B1) for p in primes[i:i + primes_per_chunk])
+                 for i in range(0, len(primes), primes_per_chunk))
+
+
+# Set by the parent once a factor is found (see _init_ecm_worker)
+_ecm_cancel = None
+
+
+def _init_ecm_worker(cancel) -> None:
+    """Pool initializer: share the event that tells running curves to stop."""
+    global _ecm_cancel
+    _ecm_cancel = cancel
+
+
+def _ecm_cancelled() -> bool:
+    return _ecm_cancel is not None and _ecm_cancel.is_set()
+
+
+# (factor digits, B1, expected curves) for ECM, after the GMP-ECM tables
+_ECM_LEVELS = (
+    (15, 2000, 25),
+    (20, 11000, 90),
+    (25, 50000, 300),
+    (30, 250000, 700),
+    (35, 1000000, 1800),
+    (40, 3000000, 5100),
+)
+
+
+def _xdbl(X: int, Z: int, a24: int, n: int) -> Tuple[int, int]:
+    """Double (X:Z) on the Montgomery curve with a24 = (A + 2) / 4."""
+    s, d = (X + Z) * (X + Z) % n, (X - Z) * (X - Z) % n
+    t = s - d
+    return s * d % n, t * (d + a24 * t) % n
+
+
+def _xadd(X1: int, Z1: int, X2: int, Z2: int, Xd: int, Zd: int,
+          n: int) -> Tuple[int, int]:
+    """Differential addition P1 + P2 given their difference (Xd:Zd)."""
+    u = (X1 - Z1) * (X2 + Z2) % n
+    v = (X1 + Z1) * (X2 - Z2) % n
+    return Zd * (u + v) ** 2 % n, Xd * (u - v) ** 2 % n
+
+
+def _ladder(k: int, X: int, Z: int, a24: int, n: int) -> Tuple[int, int]:
+    """Montgomery ladder: [k](X:Z) for k >= 1."""
+    X0, Z0 = X, Z
+    X1, Z1 = _xdbl(X, Z, a24, n)
+    for bit in bin(k)[3:]:
+        if bit == '1':
+            X0, Z0 = _xadd(X0, Z0, X1, Z1, X, Z, n)
+            X1, Z1 = _xdbl(X1, Z1, a24, n)
+        else:
+            X1, Z1 = _xadd(X0, Z0, X1, Z1, X, Z, n)
+            X0, Z0 = _xdbl(X0, Z0, a24, n)
+    return X0, Z0
+
+
+def _ecm_curve(n: int, sigma: int, B1: int, B2: int) -> Optional[int]:
+    """
+    One ECM curve (Suyama parametrization from sigma) on a Montgomery
+    curve: stage 1 multiplies by every prime power <= B1, stage 2 is the
+    baby-step/giant-step continuation over the primes in (B1, B2].
+    Returns a proper factor of n or None.
+    """
+    u = (sigma * sigma - 5) % n
+    v = 4 * sigma % n
+    X, Z = pow(u, 3, n), pow(v, 3, n)
+    numerator = pow(v - u, 3, n) * (3 * u + v) % n
+    denominator = 16 * X * v % n
+    g = math.gcd(denominator, n)
+    if g != 1:
+        return g if g != n else None
+    a24 = numerator * pow(denominator, -1, n) % n
+    
+    # Stage 1 covers at least the primes below D so stage 2 starts at m >= 1
+    D = 2310 if B2 >= 100 * 2310 else 210
+    B1 = max(B1, D)
+    B2 = max(B2, B1)
+    for k in _ecm_stage1_multipliers(B1):
+        if _ecm_cancelled():
+            return None
+        X, Z = _ladder(k, X, Z, a24, n)
+    g = math.gcd(Z, n)
+    if g != 1:
+        return g if g != n else None
+        
+    # Stage 2 baby steps: [d]Q for odd d < D/2 coprime to D
+    X2, Z2 = _xdbl(X, Z, a24, n)
+    baby = {1: (X, Z)}
+    prev, cur = (X, Z), _xadd(X2, Z2, X, Z, X, Z, n)
+    for d in range(3, D // 2, 2):
+        baby[d] = cur
+        prev, cur = cur, _xadd(cur[0], cur[1], X2, Z2, prev[0], prev[1], n)
+    baby = {d: point for d, point in baby.items() if math.gcd(d, D) == 1}
+    
+    # Giant steps: R_m = [mD]Q; each prime q = mD +/- d contributes
+    # X_R * Z_d - X_d * Z_R, which vanishes mod p when [q]Q is the identity
+    XD, ZD = _ladder(D, X, Z, a24, n)
+    primes = _primes_upto_cached(B2)
+    m = (B1 + 1 + D // 2) // D
+    R_prev = _ladder(m * D, X, Z, a24, n)
+    R = _ladder((m + 1) * D, X, Z, a24, n)
+    m += 1
+    product = 1
+    for i, q in enumerate(primes[bisect_right(primes, B1):]):
+        if i % 4096 == 0 and _ecm_cancelled():
+            return None
+        target = (q + D // 2) // D
+        while m < target:
+            R_prev, R = R, _xadd(R[0], R[1], XD, ZD, R_prev[0], R_prev[1], n)
+            m += 1
+        point = R if m == target else R_prev
+        Xd, Zd = baby[abs(q - target * D)]
+        product = product * (point[0] * Zd - Xd * point[1]) % n
+        
+    g = math.gcd(product, n)
+    return g if 1 < g < n else None
+
+
+# (max digits of kN, factor base size, sieve half-width M, threshold slack
+# in multiples of log2 of the largest factor-base prime)
+_SIQS_PARAMETERS = (
+    (30, 200, 32768, 1.6),
+    (40, 400, 65536, 1.8),
+    (50, 1200, 65536, 2.0),
+    (60, 3000, 98304, 2.1),
+    (70, 6000, 196608, 2.2),
+    (80, 12000, 262144, 2.3),
+    (90, 24000, 393216, 2.4),
+)
+
+# Primes below this bound are trial divided but not sieved
+_SIQS_SMALL_PRIME_BOUND = 30
+
+# Knuth-Schroeppel candidate multipliers (squarefree)
+_SIQS_MULTIPLIERS = (1, 2, 3, 5, 6, 7, 10, 11, 13, 14, 15, 17, 19, 21, 22,
+                     23, 26, 29, 30, 31, 33, 34, 35, 37, 38, 39, 41, 42, 43)
+
+
+def _sqrt_mod_prime(a: int, p: int) -> int:
+    """Tonelli-Shanks: a square root of the quadratic residue a modulo prime p."""
+    a %= p
+    if p == 2 or a == 0:
+        return a
+    if p % 4 == 3:
+        return pow(a, (p + 1) // 4, p)
+    q, s = p - 1, 0
+    while q % 2 == 0:
+        q //= 2
+        s += 1
+    z = 2
+    while pow(z, (p - 1) // 2, p) != p - 1:
+        z += 1
+    m, c, t, r = s, pow(z, q, p), pow(a, q, p), pow(a, (q + 1) // 2, p)
+    while t != 1:
+        i, t2 = 0, t
+        while t2 != 1:
+            t2 = t2 * t2 % p
+            i += 1
+        b = pow(c, 1 << (m - i - 1), p)
+        m, c, t, r = i, b * b % p, t * b * b % p, r * b % p
+    return r
+
+
+def _siqs_multiplier(n: int) -> int:
+    """Knuth-Schroeppel choice of k so that kn has many small residues."""
+    small = _primes_upto_cached(1000)[1:]
+    best_k, best_score = 1, -math.inf
+    for k in _SIQS_MULTIPLIERS:
+        kn = k * n
+        score = -0.5 * math.log(k)
+        if kn % 8 == 1:
+            score += 2 * math.log(2)
+        elif kn % 8 == 5:
+            score += math.log(2)
+        elif kn % 4 == 3:
+            score += 0.5 * math.log(2)
+        for p in small:
+            if k % p == 0:
+                score += math.log(p) / p
+            elif pow(kn % p, (p - 1) // 2, p) == 1:
+                score += 2 * math.log(p) / (p - 1)
+        if score > best_score:
+            best_k, best_score = k, score
+    return best_k
+
+
+# Per-process SIQS state (see _init_siqs_worker)
+_siqs_state: Dict = {}
+
+
+def _init_siqs_worker(n: int, kn: int, factor_base: List[Tuple[int, int]],
+                      half_width: int, slack: float) -> None:
+    """
+    Pool initializer: keep the factor base (as (p, sqrt(kn) mod p) pairs)
+    and the derived NumPy arrays resident in each worker.
+    """
+    primes = np.array([p for p, _ in factor_base], dtype=np.int64)
+    sieved = primes >= _SIQS_SMALL_PRIME_BOUND
+    largest = factor_base[-1][0]
+    _siqs_state.clear()
+    _siqs_state.update(
+        n=n, kn=kn, factor_base=factor_base, M=half_width,
+        primes=primes,
+        roots=np.array([t for _, t in factor_base], dtype=np.int64),
+        logs=np.round(np.log2(primes)).astype(np.uint8),
+        sieved=np.flatnonzero(sieved),
+        small=[p for p, _ in factor_base if p < _SIQS_SMALL_PRIME_BOUND],
+        large_prime_bound=64 * largest,
+        threshold=int(math.log2(half_width) + kn.bit_length() / 2
+                      - slack * math.log2(largest)),
+    )
+
+
+def _siqs_choose_a(rng: random.Random) -> Tuple[int, List[int]]:
+    """
+    Pick A as a product of factor-base primes close to √(2kn) / M.
+    Returns A and the factor-base indices of its primes.
+    """
+    state = _siqs_state
+    factor_base, kn, M = state['factor_base'], state['kn'], state['M']
+    target = math.isqrt(2 * kn) // M
+
+    # Draw from the middle of the factor base: big enough that few primes
+    # are needed, small enough that A has many choices
+    lo, hi = len(factor_base) // 4, (len(factor_base) * 3) // 4
+    mid_p = factor_base[(lo + hi) // 2][0]
+    count = max(1, round(math.log(target) / math.log(mid_p)))
+
+    best = None
+    for _ in range(30):
+        indices = set()
+        A = 1
+        while len(indices) < count - 1:
+            i = rng.randrange(lo, hi)
+            if i not in indices:
+                indices.add(i)
+                A *= factor_base[i][0]
+        # Choose the last prime to land A as close to the target as possible
+        want = target // A
+        last = min((i for i in range(lo, hi) if i not in indices),
+                   key=lambda i: abs(factor_base[i][0] - want))
+        A *= factor_base[last][0]
+        indices.add(last)
+        error = abs(math.log(A / target))
+        if best is None or error < best[0]:
+            best = (error, A, sorted(indices))
+    return best[1], best[2]
+
+
+def _siqs_trial_divide(value: int, x: int, roots1: 'np.ndarray',
+                       roots2: 'np.ndarray') -> Tuple[Dict[int, int], int]:
+    """
+    Factor value = g(x) over the factor base, testing only the primes
+    whose sieve roots match x. Returns (exponents, remaining cofactor).
+    """
+    state = _siqs_state
+    exponents = defaultdict(int)
+    if value < 0:
+        exponents[-1] = 1
+        value = -value
+    for p in state['small']:
+        while value % p == 0:
+            exponents[p] += 1
+            value //= p
+    primes = state['primes']
+    residue = x % primes
+    hits = np.flatnonzero((residue == roots1) | (residue == roots2))
+    for p in primes[hits].tolist():
+        if p < _SIQS_SMALL_PRIME_BOUND:
+            continue
+        while value % p == 0:
+            exponents[p] += 1
+            value //= p
+    return exponents, value
+
+
+def _siqs_collect(task: Tuple[int, int]) -> Tuple[List, List, int]:
+    """
+    Worker: sieve every polynomial of `families` A-values drawn with seed.
+    Returns (full relations, partial relations, polynomials sieved).
+    A relation (u, exponents) means u^2 = prod(p^e) (mod kn); a partial
+    (L, u, exponents) has one extra large prime L in the product.
+    """
+    seed, families = task
+    state = _siqs_state
+    n, kn, M = state['n'], state['kn'], state['M']
+    factor_base, primes = state['factor_base'], state['primes']
+    roots, logs, sieved = state['roots'], state['logs'], state['sieved']
+    threshold, large_bound = state['threshold'], state['large_prime_bound']
+    rng = random.Random(seed)
+    full, partial = [], []
+    polynomials = 0
+    prime_list = primes.tolist()
+
+    for _ in range(families):
+        A, a_indices = _siqs_choose_a(rng)
+        a_primes = [factor_base[i][0] for i in a_indices]
+
+        # B_l = (A/q_l) * (t_l * (A/q_l)^-1 mod q_l), so B^2 = kn (mod A)
+        B_terms = []
+        for i, q in zip(a_indices, a_primes):
+            cofactor = A // q
+            gamma = factor_base[i][1] * pow(cofactor % q, -1, q) % q
+            if gamma > q // 2:
+                gamma = q - gamma
+            B_terms.append(cofactor * gamma)
+        B = sum(B_terms)
+
+        a_inverse = np.array([pow(A % p, -1, p) if A % p else 0
+                              for p in prime_list], dtype=np.int64)
+        in_a = a_inverse == 0
+        b_mod = np.array([B % p for p in prime_list], dtype=np.int64)
+        roots1 = a_inverse * ((roots - b_mod) % primes) % primes
+        roots2 = a_inverse * ((-roots - b_mod) % primes) % primes
+        roots1[in_a] = roots2[in_a] = -1
+        b_shifts = [np.array([2 * term % p for p in prime_list], dtype=np.int64)
+                    * a_inverse % primes for term in B_terms]
+        active = sieved[~in_a[sieved]]
+
+        for index in range(1 << (len(a_primes) - 1)):
+            if index:
+                # Gray-code switch to the next B; roots move by ±2 B_l / A
+                l = (index & -index).bit_length() - 1
+                if (index >> l) & 3 == 1:
+                    B -= 2 * B_terms[l]
+                    roots1 = (roots1 + b_shifts[l]) % primes
+                    roots2 = (roots2 + b_shifts[l]) % primes
+                else:
+                    B += 2 * B_terms[l]
+                    roots1 = (roots1 - b_shifts[l]) % primes
+                    roots2 = (roots2 - b_shifts[l]) % primes
+                roots1[in_a] = roots2[in_a] = -1
+            C = (B * B - kn) // A
+
+            sieve = np.zeros(2 * M, dtype=np.uint8)
+            starts1 = ((roots1 + M) % primes)[active].tolist()
+            starts2 = ((roots2 + M) % primes)[active].tolist()
+            for p, s1, s2, log_p in zip(primes[active].tolist(), starts1,
+                                        starts2, logs[active].tolist()):
+                sieve[s1::p] += log_p
+                if s2 != s1:
+                    sieve[s2::p] += log_p
+            polynomials += 1
+
+            for i in np.flatnonzero(sieve >= threshold).tolist():
+                x = i - M
+                value = (A * x + 2 * B) * x + C
+                if value == 0:
+                    continue
+                exponents, cofactor = _siqs_trial_divide(value, x, roots1, roots2)
+                for q in a_primes:
+                    exponents[q] += 1
+                    while cofactor % q == 0:
+                        exponents[q] += 1
+                        cofactor //= q
+                if cofactor >= large_bound:
+                    continue
+                u = (A * x + B) % n
+                if cofactor == 1:
+                    full.append((u, dict(exponents)))
+                elif cofactor > factor_base[-1][0]:
+                    partial.append((cofactor, u, dict(exponents)))
+
+    return full, partial, polynomials
+
+
+def _gf2_dependencies(vectors: List[int], ncols: int) -> Iterator[int]:
+    """
+    Null-space vectors of a GF(2) matrix whose rows are int bitmasks.
+    A structured pass first discards rows holding a column no other row
+    has (they cannot be in any dependency); the rest is reduced by
+    Gaussian elimination. Yields bitmasks over the original row indices.
+    """
+    alive = set(range(len(vectors)))
+    while True:
+        counts = defaultdict(int)
+        for i in alive:
+            v = vectors[i]
+            while v:
+                low = v & -v
+                counts[low] += 1
+                v ^= low
+        singletons = {bit for bit, c in counts.items() if c == 1}
+        removed = {i for i in alive if any(vectors[i] & bit for bit in singletons)}
+        if not removed:
+            break
+        alive -= removed
+
+    pivots = {}
+    for i in sorted(alive):
+        row = vectors[i] | (1 << (ncols + i))
+        low_mask = row & ((1 << ncols) - 1)
+        while low_mask:
+            low = low_mask & -low_mask
+            pivot = pivots.get(low)
+            if pivot is None:
+                pivots[low] = row
+                break
+            row ^= pivot
+            low_mask = row & ((1 << ncols) - 1)
+        else:
+            yield row >> ncols
+
+
+def _lucas_v(k: int, v: int, n: int) -> int:
+    """V_k of the Lucas sequence V_0 = 2, V_1 = v, V_(j+1) = v V_j - V_(j-1), mod n."""
+    x, y = 2, v
+    for bit in bin(k)[2:]:
+        if bit == '1':
+            x, y = (x * y - v) % n, (y * y - 2) % n
+        else:
+            x, y = (x * x - 2) % n, (x * y - v) % n
+    return x
+
+
+def _lucas_stage2(v: int, n: int, B1: int, B2: int, primes: Sequence[int]) -> int:
+    """
+    Baby-step/giant-step stage 2 shared by p-1 and p+1, on v = α + 1/α.
+    For every prime q = mD ± d in (B1, B2] it multiplies in V_mD - V_d,
+    which vanishes mod p exactly when α^q = 1 in the group mod p.
+    Returns gcd(product, n).
+    """
+    D = 2310 if B2 >= 100 * 2310 else 210
+    
+    # Baby steps V_d for odd d < D/2, via V_(d+2) = V_d V_2 - V_(d-2)
+    v2 = (v * v - 2) % n
+    baby = {1: v}
+    prev, cur = v, (v2 * v - v) % n
+    for d in range(3, D // 2, 2):
+        baby[d] = cur
+        prev, cur = cur, (cur * v2 - prev) % n
+        
+    # Giant steps W_m = V_mD, via W_(m+1) = W_m V_D - W_(m-1)
+    vD = _lucas_v(D, v, n)
+    start = bisect_right(primes, B1)
+    if start == len(primes):
+        return 1
+    m = (primes[start] + D // 2) // D
+    w_prev, w = _lucas_v((m - 1) * D, v, n), _lucas_v(m * D, v, n)
+    product = 1
+    for q in primes[start:bisect_right(primes, B2)]:
+        target = (q + D // 2) // D
+        while m < target:
+            w_prev, w = w, (w * vD - w_prev) % n
+            m += 1
+        product = product * (w - baby[abs(q - m * D)]) % n
+    return math.gcd(product, n)
+
+
+# Squarefree SQUFOF multipliers, as in Gower & Wagstaff (2008)
+_SQUFOF_MULTIPLIERS = (1, 3, 5, 7, 11, 3 * 5, 3 * 7, 3 * 11, 5 * 7, 5 * 11,
+                       7 * 11, 3 * 5 * 7, 3 * 5 * 11, 3 * 7 * 11, 5 * 7 * 11,
+                       3 * 5 * 7 * 11)
+
+# Cofactors below this size go to the SQUFOF fast path. Measured on random
+# balanced semiprimes, SQUFOF here only matches or beats Brent rho on mean
+# time up to about 2^42; beyond that its multiplier retries dominate p99.
+SMALL_FACTOR_LIMIT = 1 << 42
+
+# Multipliers small_factor tries before handing over to rho
+_SMALL_FACTOR_SQUFOF_MULTIPLIERS = 4
+
+
+def _chunk_bounds(lo: int, hi: int, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    """Split [lo, hi) into consecutive half-open chunks."""
+    for start in range(lo, hi, chunk_size):
+        yield start, min(start + chunk_size, hi)
+
+
+def _ordered_pool_map(executor: Executor, fn: Callable, tasks: Iterable,
+                      window: int) -> Iterator:
+    """
+    Like executor.map, but keeps at most `window` tasks in flight so that
+    huge task streams are never materialized. Results come back in order.
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(executor.submit(fn, task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Lazily split an iterable into lists of at most size items."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# Base primes of the current sieve worker process (see _init_sieve_worker)
+_worker_base_primes: List[int] = []
+
+
+def _init_sieve_worker(limit: int) -> None:
+    """Pool initializer: each worker sieves its own base primes up to √limit."""
+    global _worker_base_primes
+    _worker_base_primes = _odd_primes_upto(math.isqrt(max(limit, 0)))
+
+
+def _sieve_chunk_primes(task: Tuple[int, int, int]) -> List[int]:
+    """Worker: primes in [lo, hi), sieved one cache-sized window at a time."""
+    lo, hi, segment_size = task
+    primes = []
+    for seg_lo, seg_hi in _chunk_bounds(lo, hi, 2 * segment_size):
+        primes += _segment_primes(seg_lo, seg_hi, _worker_base_primes)
+    return primes
+
+
+def _sieve_chunk_stats(task: Tuple[int, int, int]) -> Tuple[int, Optional[int], Optional[int], Dict[int, int]]:
+    """
+    Worker: (count, first prime, last prime, gap histogram) for [lo, hi).
+    Only these aggregates travel back to the parent process.
+    """
+    lo, hi, segment_size = task
+    count = 0
+    first = last = None
+    gaps = defaultdict(int)
+    for seg_lo, seg_hi in _chunk_bounds(lo, hi, 2 * segment_size):
+        primes = _segment_primes(seg_lo, seg_hi, _worker_base_primes)
+        if not primes:
+            continue
+        if last is not None:
+            gaps[primes[0] - last] += 1
+        else:
+            first = primes[0]
+        for i in range(len(primes) - 1):
+            gaps[primes[i+1] - primes[i]] += 1
+        count += len(primes)
+        last = primes[-1]
+    return count, first, last, dict(gaps)
+
+
+def _gap_chunk_scan(task: Tuple[int, int, int]) -> Tuple[Optional[int], Optional[int], List[Tuple[int, int]], Dict[int, int]]:
+    """
+    Worker: scan the primes in [lo, hi) for gap records.
+    Returns (first prime, last prime, running-maximum gaps as (gap, p),
+    first occurrence p of each gap size). Windows widen to √hi so each
+    base prime touches each window at most a few times.
+    """
+    lo, hi, segment_size = task
+    span = max(2 * segment_size, math.isqrt(hi) + 1)
+    first = last = None
+    records = []
+    first_occurrences = {}
+    best = 0
+    
+    for seg_lo, seg_hi in _chunk_bounds(lo, hi, span):
+        primes = _segment_primes(seg_lo, seg_hi, _worker_base_primes)
+        if not primes:
+            continue
+        if last is None:
+            first = primes[0]
+            seq = primes
+        else:
+            seq = [last] + primes
+        last = seq[-1]
+        gaps = list(map(operator.sub, islice(seq, 1, None), seq))
+        if not gaps:
+            continue
+            
+        for gap in set(gaps).difference(first_occurrences):
+            first_occurrences[gap] = seq[gaps.index(gap)]
+        if max(gaps) > best:
+            for i, gap in enumerate(gaps):
+                if gap > best:
+                    best = gap
+                    records.append((gap, seq[i]))
+                    
+    return first, last, records, first_occurrences
+
+
+# Named prime constellations as offsets from the first member
+PRIME_PATTERNS = {
+    'twin': (0, 2),
+    'cousin': (0, 4),
+    'sexy': (0, 6),
+    'triplet': (0, 2, 6),
+    'triplet_alt': (0, 4, 6),
+    'quadruplet': (0, 2, 6, 8),
+    'quintuplet': (0, 2, 6, 8, 12),
+    'quintuplet_alt': (0, 4, 6, 10, 12),
+    'sextuplet': (0, 4, 6, 10, 12, 16),
+}
+
+# Candidate first members are pre-filtered modulo 2 * 3 * 5 * 7 * 11
+_TUPLE_WHEEL_PRIMES = (2, 3, 5, 7, 11)
+_TUPLE_WHEEL = 2310
+
+
+def _is_admissible(offsets: Tuple[int, ...]) -> bool:
+    """
+    A pattern can occur infinitely often only if, for every prime p, the
+    offsets miss at least one residue class mod p. Only p <= len(offsets)
+    can be fully covered.
+    """
+    for p in [2] + _odd_primes_upto(len(offsets)):
+        if len({o % p for o in offsets}) == p:
+            return False
+    return True
+
+
+def _tuple_residues(offsets: Tuple[int, ...]) -> List[int]:
+    """Residues r mod _TUPLE_WHEEL with every r + offset coprime to the wheel."""
+    return [r for r in range(1, _TUPLE_WHEEL, 2)
+            if all(math.gcd(r + o, _TUPLE_WHEEL) == 1 for o in offsets)]
+
+
+def _tuple_window(lo: int, hi: int, offsets: Tuple[int, ...], residues: List[int],
+                  base_primes: List[int]) -> List[int]:
+    """
+    First members n in [lo, hi) of the pattern, for lo a multiple of
+    _TUPLE_WHEEL and lo > max(_TUPLE_WHEEL_PRIMES). For each admissible
+    residue the flags at every offset are sliced with stride wheel/2 and
+    AND-ed as big integers, so no candidate is visited in Python.
+    """
+    flags = _odd_segment_flags(lo, hi + offsets[-1], base_primes)
+    stride = _TUPLE_WHEEL // 2
+    found = []
+    for r in residues:
+        count = (hi - lo - r + _TUPLE_WHEEL - 1) // _TUPLE_WHEEL
+        if count <= 0:
+            continue
+        start = (r - 1) // 2
+        hits = -1
+        for o in offsets:
+            first = start + o // 2
+            hits &= int.from_bytes(flags[first:first + count * stride:stride], 'big')
+        if hits:
+            found += compress(range(lo + r, hi, _TUPLE_WHEEL), hits.to_bytes(count, 'big'))
+    found.sort()
+    return found
+
+
+def _self_convolution(flags: bytes, use_numpy: bool) -> List[int]:
+    """
+    Exact c[k] = sum(flags[i] * flags[k - i]) for a 0/1 byte string.
+    The NumPy path uses a real FFT and rounds; the pure-Python path packs
+    the flags into one big number (Kronecker substitution) with decimal
+    digit groups wide enough that no coefficient carries, then squares it
+    with the decimal module, whose number-theoretic transform multiply is
+    far faster than int's Karatsuba at these sizes.
+    """
+    size = len(flags)
+    if size == 0:
+        return []
+    if use_numpy:
+        length = 1 << (2 * size - 1).bit_length()
+        spectrum = np.fft.rfft(np.frombuffer(flags, dtype=np.uint8), length)
+        product = np.fft.irfft(spectrum * spectrum, length)[:2 * size - 1]
+        return np.rint(product).astype(np.int64).tolist()
+        
+    # Coefficients are at most the number of set flags. Group i holds
+    # flags[i] and group 0 is the most significant, so coefficient k of
+    # the square sits in group k + 1 of its 2 * size groups.
+    width = len(str(flags.count(1)))
+    digits = bytearray(b'0') * (size * width)
+    digits[width - 1::width] = flags.translate(_FLAGS_TO_DIGITS)
+    context = decimal.Context(prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX)
+    value = decimal.Decimal(digits.decode())
+    square = str(context.multiply(value, value)).rjust(2 * size * width, '0')
+    return [int(square[j:j + width]) for j in range(width, 2 * size * width, width)]
+
+
+def _icbrt(n: int) -> int:
+    """Integer cube root: the largest r with r^3 <= n."""
+    r = int(round(n ** (1 / 3)))
+    while r ** 3 > n:
+        r -= 1
+    while (r + 1) ** 3 <= n:
+        r += 1
+    return r
+
+
+def _li(x: float) -> float:
+    """Logarithmic integral li(x) for x > 1, by Ramanujan's series."""
+    log_x = math.log(x)
+    total = 0.0
+    term = -1.0
+    inner = 0.0
+    for n in range(1, 200):
+        term *= -log_x / n / 2
+        if n % 2 == 1:
+            inner += 1 / n
+        step = term * inner * 2
+        total += step
+        if abs(step) < 1e-17 * abs(total):
+            break
+    return 0.5772156649015329 + math.log(log_x) + math.sqrt(x) * total
+
+
+def _inverse_prime_count_estimate(k: int) -> int:
+    """
+    x with li(x) - li(√x)/2 ≈ k, the first two terms of Riemann's R(x),
+    found by Newton's method. Typically within O(√x) of the k-th prime.
+    """
+    x = k * math.log(k) + k * math.log(math.log(k)) if k >= 6 else 13.0
+    for _ in range(100):
+        step = (_li(x) - _li(math.sqrt(x)) / 2 - k) * math.log(x)
+        x -= step
+        if abs(step) < 1:
+            break
+    return int(x)
+
+
+def _perfect_power_root(n: int) -> Optional[int]:
+    """r with r^e == n for the smallest prime e that has one, or None if n is no perfect power."""
+    for e in _primes_upto_cached(n.bit_length()):
+        # Integer Newton from a power of two above the root descends to
+        # floor(n^(1/e)) exactly, whatever the size of n
+        r = 1 << -(-n.bit_length() // e)
+        while True:
+            s = ((e - 1) * r + n // r ** (e - 1)) // e
+            if s >= r:
+                break
+            r = s
+        if r > 1 and r ** e == n:
+            return r
+    return None
+
+
+# φ(v, c) for c this small comes from a table periodic modulo p_1 ... p_c
+_PHI_TABLE_PRIMES = 7
+
+
+@lru_cache(maxsize=None)
+def _phi_table(c: int) -> Tuple[int, List[int]]:
+    """
+    (P, counts) with P = p_1 * ... * p_c and counts[r] the number of
+    1 <= m <= r coprime to P, so φ(v, c) = (v // P) * counts[P - 1] + counts[v % P].
+    """
+    primes = _primes_upto_cached(20)[:c]
+    modulus = math.prod(primes)
+    coprime = bytearray(b'\x01') * modulus
+    coprime[0] = 0
+    for p in primes:
+        coprime[::p] = bytes(len(range(0, modulus, p)))
+    return modulus, list(accumulate(coprime))
+
+
+def _phi_leaves(x: int, primes: List[int]) -> Tuple[int, Dict[int, int]]:
+    """
+    Expand φ(x, a), a = len(primes), with φ(v, b) = φ(v, b-1) - φ(v // p_b, b-1)
+    one level at a time, merging equal arguments into one weighted term.
+    A term φ(v, b) stops expanding once v < p_{b+1}^2, where it equals
+    1 + max(0, π(v) - b), or once b reaches the periodic table.
+    Returns (constant, weights) with φ(x, a) = constant + sum(w * π(v)).
+    """
+    a = len(primes)
+    c = min(_PHI_TABLE_PRIMES, a)
+    constant = 0
+    weights = defaultdict(int)
+    level = {x: 1}
+    
+    for b in range(a, c, -1):
+        p = primes[b - 1]
+        square = p * p
+        # Every v at this level is >= p_{b+1}^2 > p_b^2, so the φ(v, b-1)
+        # terms carry over unchanged and only the φ(v // p_b, b-1) are new
+        expanded = defaultdict(int, level)
+        for v, k in level.items():
+            w = v // p
+            if w >= square:
+                expanded[w] -= k
+            elif w >= p:
+                # φ(w, b - 1) = π(w) - (b - 1) + 1 for p_b <= w < p_b^2
+                constant -= k * (2 - b)
+                weights[w] -= k
+            elif w:
+                constant -= k
+        level = expanded
+        
+    modulus, counts = _phi_table(c)
+    for v, k in level.items():
+        constant += k * ((v // modulus) * counts[-1] + counts[v % modulus])
+    return constant, weights
+
+
+def _count_odd_primes_at(lo: int, hi: int, points: List[int], base_primes: List[int],
+                         segment_size: int) -> Tuple[int, List[int]]:
+    """
+    Sieve [lo, hi) and return (odd primes in [lo, hi), odd primes in
+    [lo, v] for each v of the sorted points, all of which lie in [lo, hi)).
+    """
+    total = 0
+    counts = []
+    i = 0
+    for seg_lo, seg_hi in _chunk_bounds(lo, hi, 2 * segment_size):
+        flags = _odd_segment_flags(seg_lo, seg_hi, base_primes)
+        first = seg_lo | 1
+        position = 0
+        while i < len(points) and points[i] < seg_hi:
+            # Count only the flags since the previous point
+            end = max(points[i] - first + 2, 0) // 2
+            total += flags.count(1, position, end)
+            position = max(position, end)
+            counts.append(total)
+            i += 1
+        total += flags.count(1, position)
+    return total, counts
+
+
+def _prime_count_chunk(task: Tuple[int, int, List[int], int]) -> Tuple[int, List[int]]:
+    """Worker: _count_odd_primes_at with the worker's base primes."""
+    lo, hi, points, segment_size = task
+    return _count_odd_primes_at(lo, hi, points, _worker_base_primes, segment_size)
+
+
+# Factoring engine of the current factor_many worker process
+_worker_algorithms = None
+
+
+def _init_factor_worker() -> None:
+    """Pool initializer: one RealPrimeAlgorithms (and its caches) per worker."""
+    global _worker_algorithms
+    _worker_algorithms = RealPrimeAlgorithms()
+
+
+def _factor_chunk(chunk: List[int]) -> List[Tuple[int, List[int]]]:
+    """Worker: (n, prime factors) for every n in the chunk."""
+    return [(n, _worker_algorithms.factor_complete(n)) for n in chunk]
+
+
+class RankSelectIndex:
+    """
+    Succinct rank/select directory over a bit-packed buffer (bit i is bit
+    i % 8 of byte i // 8). Superblocks of 2^16 bits keep absolute counts
+    in array('Q'); 512-bit blocks keep counts relative to their superblock
+    in array('H'), about 0.4% overhead. rank() reads two counts and
+    popcounts at most one block; select() bisects the counts, then scans
+    at most one block.
+    """
+    
+    BLOCK_BYTES = 64
+    SUPERBLOCK_BYTES = 8192
+    
+    def __init__(self, data):
+        self.data = data
+        self.superblocks = array('Q')
+        self.blocks = array('H')
+        total = 0
+        per_super = self.SUPERBLOCK_BYTES // self.BLOCK_BYTES
+        for b, start in enumerate(range(0, len(data), self.BLOCK_BYTES)):
+            if b % per_super == 0:
+                self.superblocks.append(total)
+            self.blocks.append(total - self.superblocks[-1])
+            total += int.from_bytes(data[start:start + self.BLOCK_BYTES], 'little').bit_count()
+        self.total = total
+    
+    def rank(self, i: int) -> int:
+        """Number of set bits at positions [0, i)."""
+        if i <= 0:
+            return 0
+        byte = min(i >> 3, len(self.data))
+        block = byte // self.BLOCK_BYTES
+        if block == len(self.blocks):
+            return self.total
+        count = self.superblocks[byte // self.SUPERBLOCK_BYTES] + self.blocks[block]
+        count += int.from_bytes(self.data[block * self.BLOCK_BYTES:byte], 'little').bit_count()
+        if i & 7 and byte < len(self.data):
+            count += (self.data[byte] & ((1 << (i & 7)) - 1)).bit_count()
+        return count
+    
+    def select(self, k: int) -> int:
+        """Position of the k-th set bit, counting from k = 1."""
+        if not 1 <= k <= self.total:
+            raise ValueError(f"select({k}) is outside 1..{self.total}")
+        per_super = self.SUPERBLOCK_BYTES // self.BLOCK_BYTES
+        sb = bisect_left(self.superblocks, k) - 1
+        first = sb * per_super
+        blocks = self.blocks[first:first + per_super]
+        block = first + bisect_left(blocks, k - self.superblocks[sb]) - 1
+        k -= self.superblocks[sb] + self.blocks[block]
+        
+        byte = block * self.BLOCK_BYTES
+        while True:
+            ones = self.data[byte].bit_count()
+            if ones >= k:
+                break
+            k -= ones
+            byte += 1
+        value = self.data[byte]
+        for _ in range(k - 1):
+            value &= value - 1
+        return 8 * byte + (value & -value).bit_length() - 1
+
+
+class PrimeBitmap:
+    """
+    Bit-packed, odds-only primality table for the integers 0..limit.
+    Bit i stands for the odd number 2i + 1, so the table costs limit/16
+    bytes instead of one list slot per integer.
+    """
+    
+    def __init__(self, limit: int, segment_size: int = SEGMENT_SIZE):
+        self.limit = max(limit, 0)
+        self.nbits = (self.limit + 1) // 2
+        self.bits = bytearray()
+        self._rank = None
+        
+        # Windows start on byte boundaries so packed chunks simply concatenate
+        segment_size = max(8, segment_size - segment_size % 8)
+        base_primes = _odd_primes_upto(math.isqrt(self.limit))
+        for lo in range(0, self.limit + 1, 2 * segment_size):
+            hi = min(lo + 2 * segment_size, self.limit + 1)
+            self.bits += _pack_flags(_odd_segment_flags(lo, hi, base_primes))
+    
+    def is_prime(self, n: int) -> bool:
+        """O(1) primality lookup for 0 <= n <= limit."""
+        if n > self.limit:
+            raise ValueError(f"{n} is beyond the bitmap limit {self.limit}")
+        if n < 3:
+            return n == 2
+        if n % 2 == 0:
+            return False
+        i = n >> 1
+        return bool(self.bits[i >> 3] >> (i & 7) & 1)
+    
+    __contains__ = is_prime
+    
+    def primes(self, lo: int = 0, hi: Optional[int] = None,
+               chunk_bytes: int = 1 << 16) -> Iterator[int]:
+        """Iterate the primes in [lo, hi) in increasing order."""
+        hi = self.limit + 1 if hi is None else min(hi, self.limit + 1)
+        if lo <= 2 < hi:
+            yield 2
+        
+        first_bit = max(lo, 0) // 2
+        last_bit = max(hi, 0) // 2
+        for start in range(first_bit - first_bit % 8, last_bit, 8 * chunk_bytes):
+            stop = min(start + 8 * chunk_bytes, last_bit)
+            flags = _unpack_bits(self.bits[start // 8:(stop + 7) // 8], stop - start)
+            skip = max(first_bit - start, 0)
+            yield from compress(range(2 * (start + skip) + 1, 2 * stop + 1, 2),
+                                flags[skip:])
+    
+    def __iter__(self) -> Iterator[int]:
+        return self.primes()
+    
+    def rank_index(self) -> RankSelectIndex:
+        """Rank/select directory over the bits, built on first use."""
+        if self._rank is None:
+            self._rank = RankSelectIndex(self.bits)
+        return self._rank
+    
+    def prime_pi(self, n: int) -> int:
+        """Number of primes <= n, for n <= limit, by one rank query."""
+        if n > self.limit:
+            raise ValueError(f"{n} is beyond the bitmap limit {self.limit}")
+        if n < 2:
+            return 0
+        # Bits 0 .. (n - 1) // 2 are the odd numbers up to n; 2 is implicit
+        return 1 + self.rank_index().rank((n + 1) // 2)
+    
+    def nth_prime(self, k: int) -> int:
+        """The k-th prime (nth_prime(1) == 2), by one select query."""
+        count = self.prime_pi(self.limit)
+        if not 1 <= k <= count:
+            raise ValueError(f"k={k} is outside 1..{count}, the primes up to {self.limit}")
+        if k == 1:
+            return 2
+        return 2 * self.rank_index().select(k - 1) + 1
+
+
+# Residues coprime to 30; bit b of table byte j stands for 30j + _WHEEL_RESIDUES[b]
+_WHEEL_RESIDUES = (1, 7, 11, 13, 17, 19, 23, 29)
+_WHEEL_BIT = {r: b for b, r in enumerate(_WHEEL_RESIDUES)}
+
+
+@lru_cache(maxsize=4)
+def _wheel_offsets(nbytes: int) -> Tuple[int, ...]:
+    """30j + residue for every bit of nbytes table bytes, in bit order."""
+    return tuple(30 * j + r for j in range(nbytes) for r in _WHEEL_RESIDUES)
+
+
+class PrimeTable:
+    """
+    Persistent, memory-mapped primality table for 0..limit.
+    The file is a header followed by a mod-30 wheel bitmap: byte j holds
+    one bit for each of 30j + 1, 7, 11, 13, 17, 19, 23, 29, so the table
+    costs limit/30 bytes. Build it once with PrimeTable.build(); every
+    process that opens the file then shares the same page-cached mapping.
+    """
+    
+    MAGIC = b'PRIMTBL\0'
+    VERSION = 1
+    # magic, version, limit, payload bytes, crc32 of the payload
+    HEADER = struct.Struct('<8sIQQI')
+    
+    def __init__(self, path: str, verify: bool = True):
+        self.path = path
+        self._rank = None
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._map) < self.HEADER.size:
+                raise ValueError(f"{path} is not a prime table")
+            magic, version, limit, nbytes, checksum = self.HEADER.unpack_from(self._map)
+            if magic != self.MAGIC:
+                raise ValueError(f"{path} is not a prime table")
+            if version != self.VERSION:
+                raise ValueError(f"{path} has unsupported table version {version}")
+            if len(self._map) != self.HEADER.size + nbytes:
+                raise ValueError(f"{path} is truncated")
+            self.limit = limit
+            self.nbytes = nbytes
+            self.data = memoryview(self._map)[self.HEADER.size:]
+            if verify and zlib.crc32(self.data) != checksum:
+                raise ValueError(f"{path} failed its checksum")
+        except ValueError:
+            self.close()
+            raise
+    
+    @classmethod
+    def build(cls, path: str, limit: int, segment_size: int = 1 << 20) -> 'PrimeTable':
+        """
+        Sieve 0..limit into a new table file at path and open it. The file
+        is written beside path and renamed into place, so readers never see
+        a partial table.
+        """
+        limit = max(limit, 0)
+        nbytes = limit // 30 + 1
+        base_primes = _odd_primes_upto(math.isqrt(limit))
+        span = 30 * max(1, segment_size // 15)
+        checksum = 0
+        
+        with open(path + '.tmp', 'wb') as f:
+            f.write(bytes(cls.HEADER.size))
+            for lo in range(0, 30 * nbytes, span):
+                hi = min(lo + span, 30 * nbytes)
+                flags = _odd_segment_flags(lo, min(hi, limit + 1), base_primes)
+                flags += bytes((hi - lo) // 2 - len(flags))
+                # Column b holds 30j + r_b for each j; the columns are 0/1
+                # bytes, so shifting each into its bit and summing packs them
+                packed = sum(int.from_bytes(flags[(r - 1) // 2::15], 'big') << b
+                             for b, r in enumerate(_WHEEL_RESIDUES))
+                chunk = packed.to_bytes((hi - lo) // 30, 'big')
+                checksum = zlib.crc32(chunk, checksum)
+                f.write(chunk)
+            f.seek(0)
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, limit, nbytes, checksum))
+        os.replace(path + '.tmp', path)
+        return cls(path, verify=False)
+    
+    def close(self) -> None:
+        self._rank = None
+        if getattr(self, 'data', None) is not None:
+            self.data.release()
+            self.data = None
+        self._map.close()
+    
+    def __enter__(self) -> 'PrimeTable':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def __reduce__(self):
+        # Worker processes reopen the file and share its page cache
+        return (type(self), (self.path, False))
+    
+    def is_prime(self, n: int) -> bool:
+        """O(1) primality lookup for 0 <= n <= limit."""
+        if n > self.limit:
+            raise ValueError(f"{n} is beyond the table limit {self.limit}")
+        if n < 7:
+            return n in (2, 3, 5)
+        bit = _WHEEL_BIT.get(n % 30)
+        return bit is not None and bool(self.data[n // 30] >> bit & 1)
+    
+    __contains__ = is_prime
+    
+    def primes(self, lo: int = 0, hi: Optional[int] = None,
+               chunk_bytes: int = 1 << 14) -> Iterator[int]:
+        """Iterate the primes in [lo, hi) in increasing order."""
+        hi = self.limit + 1 if hi is None else min(hi, self.limit + 1)
+        lo = max(lo, 0)
+        yield from (p for p in (2, 3, 5) if lo <= p < hi)
+        
+        offsets = _wheel_offsets(chunk_bytes)
+        for start in range(lo // 30, (hi + 29) // 30, chunk_bytes):
+            stop = min(start + chunk_bytes, (hi + 29) // 30)
+            flags = _unpack_bits(self.data[start:stop], 8 * (stop - start))
+            primes = list(map((30 * start).__add__, compress(offsets, flags)))
+            yield from primes[bisect_left(primes, lo):bisect_left(primes, hi)]
+    
+    def __iter__(self) -> Iterator[int]:
+        return self.primes()
+    
+    def rank_index(self) -> RankSelectIndex:
+        """Rank/select directory over the mapped bitmap, built on first use."""
+        if self._rank is None:
+            self._rank = RankSelectIndex(self.data)
+        return self._rank
+    
+    def prime_pi(self, n: int) -> int:
+        """Number of primes <= n, for n <= limit, by one rank query."""
+        if n > self.limit:
+            raise ValueError(f"{n} is beyond the table limit {self.limit}")
+        if n < 7:
+            return sum(1 for p in (2, 3, 5) if p <= n)
+        # Wheel bits for the numbers up to n, plus 2, 3 and 5
+        position = 8 * (n // 30) + bisect_right(_WHEEL_RESIDUES, n % 30)
+        return 3 + self.rank_index().rank(position)
+    
+    def nth_prime(self, k: int) -> int:
+        """The k-th prime (nth_prime(1) == 2), by one select query."""
+        count = self.prime_pi(self.limit)
+        if not 1 <= k <= count:
+            raise ValueError(f"k={k} is outside 1..{count}, the primes up to {self.limit}")
+        if k <= 3:
+            return (2, 3, 5)[k - 1]
+        position = self.rank_index().select(k - 3)
+        return 30 * (position >> 3) + _WHEEL_RESIDUES[position & 7]
+    
+    def count(self, lo: int = 0, hi: Optional[int] = None) -> int:
+        """Number of primes in [lo, hi), as the difference of two ranks."""
+        hi = self.limit + 1 if hi is None else min(hi, self.limit + 1)
+        lo = max(lo, 0)
+        if lo >= hi:
+            return 0
+        return self.prime_pi(hi - 1) - self.prime_pi(lo - 1)
+
+
+class PrimeArray:
+    """
+    Compact, read-mostly sequence of increasing integers (typically
+    primes), about 1.25 bytes per element instead of a list's ~36.
+    Every block_size-th element is kept as an absolute checkpoint; the
+    others are stored as half-gaps, one byte each. A 0 byte escapes a gap
+    that is odd or above 510, which follows as a LEB128 varint. Indexing
+    decodes one block; searches bisect the checkpoints first.
+    """
+    
+    MAGIC = b'PRIMARR\0'
+    VERSION = 1
+    # magic, version, block size, length, blocks, data bytes, crc32 of the payload
+    HEADER = struct.Struct('<8sIIQQQI')
+    
+    def __init__(self, values: Iterable[int] = (), block_size: int = 64):
+        self.block_size = block_size
+        self._len = 0
+        self._last = None
+        self._checkpoints = array('Q')
+        self._offsets = array('Q')
+        self._data = bytearray()
+        self.extend(values)
+    
+    def append(self, value: int) -> None:
+        """Add value, which must exceed the current last element."""
+        if self._len % self.block_size == 0:
+            if self._last is not None and value <= self._last:
+                raise ValueError("PrimeArray values must be strictly increasing")
+            self._checkpoints.append(value)
+            self._offsets.append(len(self._data))
+        else:
+            gap = value - self._last
+            if gap <= 0:
+                raise ValueError("PrimeArray values must be strictly increasing")
+            if gap % 2 == 0 and gap <= 510:
+                self._data.append(gap >> 1)
+            else:
+                self._data.append(0)
+                while gap > 0x7f:
+                    self._data.append(gap & 0x7f | 0x80)
+                    gap >>= 7
+                self._data.append(gap)
+        self._last = value
+        self._len += 1
+    
+    def extend(self, values: Iterable[int]) -> None:
+        """Append each of values; whole blocks of short even gaps are packed in bulk."""
+        iterator = iter(values)
+        while self._len % self.block_size:
+            value = next(iterator, None)
+            if value is None:
+                return
+            self.append(value)
+            
+        for block in _chunked(iterator, self.block_size):
+            gaps = list(map(operator.sub, islice(block, 1, None), block))
+            if (self._last is None or block[0] > self._last) and \
+                    (not gaps or (min(gaps) > 0 and max(gaps) <= 510
+                                  and not any(map((1).__and__, gaps)))):
+                self._checkpoints.append(block[0])
+                self._offsets.append(len(self._data))
+                self._data += bytes(map((1).__rrshift__, gaps))
+                self._last = block[-1]
+                self._len += len(block)
+            else:
+                for value in block:
+                    self.append(value)
+    
+    def _block(self, b: int) -> List[int]:
+        """Decoded values of block b."""
+        end = self._offsets[b + 1] if b + 1 < len(self._offsets) else len(self._data)
+        chunk = self._data[self._offsets[b]:end]
+        base = self._checkpoints[b]
+        if 0 not in chunk:
+            return list(accumulate(map((2).__mul__, chunk), initial=base))
+        
+        values = [base]
+        i = 0
+        while i < len(chunk):
+            half = chunk[i]
+            i += 1
+            if half:
+                base += 2 * half
+            else:
+                gap = shift = 0
+                while True:
+                    byte = chunk[i]
+                    i += 1
+                    gap |= (byte & 0x7f) << shift
+                    shift += 7
+                    if byte < 0x80:
+                        break
+                base += gap
+            values.append(base)
+        return values
+    
+    def __len__(self) -> int:
+        return self._len
+    
+    def __getitem__(self, index):
+        """Element by index, or a list of elements for a slice."""
+        if isinstance(index, slice):
+            indices = range(*index.indices(self._len))
+            if not indices:
+                return []
+            lo, hi = min(indices), max(indices) + 1
+            values = []
+            for b in range(lo // self.block_size, (hi - 1) // self.block_size + 1):
+                values += self._block(b)
+            values = values[lo % self.block_size:lo % self.block_size + hi - lo]
+            return values if indices.step == 1 else [values[i - lo] for i in indices]
+            
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("PrimeArray index out of range")
+        return self._block(index // self.block_size)[index % self.block_size]
+    
+    def __iter__(self) -> Iterator[int]:
+        for b in range(len(self._checkpoints)):
+            yield from self._block(b)
+    
+    def bisect_left(self, value: int) -> int:
+        """Index of the first element >= value."""
+        b = bisect_right(self._checkpoints, value) - 1
+        if b < 0:
+            return 0
+        return b * self.block_size + bisect_left(self._block(b), value)
+    
+    def bisect_right(self, value: int) -> int:
+        """Index of the first element > value."""
+        b = bisect_right(self._checkpoints, value) - 1
+        if b < 0:
+            return 0
+        return b * self.block_size + bisect_right(self._block(b), value)
+    
+    def index(self, value: int) -> int:
+        i = self.bisect_left(value)
+        if i < self._len and self[i] == value:
+            return i
+        raise ValueError(f"{value} is not in the PrimeArray")
+    
+    def __contains__(self, value: int) -> bool:
+        i = self.bisect_left(value)
+        return i < self._len and self[i] == value
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the encoded data and checkpoints."""
+        return len(self._data) + self._checkpoints.itemsize * 2 * len(self._checkpoints)
+    
+    def __repr__(self) -> str:
+        return f"PrimeArray(len={self._len}, nbytes={self.nbytes})"
+    
+    def save(self, path: str) -> None:
+        """Write the encoded array to path (little-endian, crc32-checked)."""
+        checkpoints, offsets = array('Q', self._checkpoints), array('Q', self._offsets)
+        if sys.byteorder == 'big':
+            checkpoints.byteswap()
+            offsets.byteswap()
+        payload = (checkpoints.tobytes(), offsets.tobytes(), bytes(self._data))
+        checksum = 0
+        for part in payload:
+            checksum = zlib.crc32(part, checksum)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.block_size, self._len,
+                                     len(self._checkpoints), len(self._data), checksum))
+            for part in payload:
+                f.write(part)
+        os.replace(path + '.tmp', path)
+    
+    @classmethod
+    def load(cls, path: str) -> 'PrimeArray':
+        """Read an array written by save()."""
+        with open(path, 'rb') as f:
+            header = f.read(cls.HEADER.size)
+            if len(header) < cls.HEADER.size:
+                raise ValueError(f"{path} is not a PrimeArray file")
+            magic, version, block_size, length, nblocks, ndata, checksum = cls.HEADER.unpack(header)
+            if magic != cls.MAGIC:
+                raise ValueError(f"{path} is not a PrimeArray file")
+            if version != cls.VERSION:
+                raise ValueError(f"{path} has unsupported PrimeArray version {version}")
+            payload = f.read()
+        if len(payload) != 16 * nblocks + ndata:
+            raise ValueError(f"{path} is truncated")
+        if zlib.crc32(payload) != checksum:
+            raise ValueError(f"{path} failed its checksum")
+            
+        result = cls(block_size=block_size)
+        result._checkpoints.frombytes(payload[:8 * nblocks])
+        result._offsets.frombytes(payload[8 * nblocks:16 * nblocks])
+        if sys.byteorder == 'big':
+            result._checkpoints.byteswap()
+            result._offsets.byteswap()
+        result._data = bytearray(payload[16 * nblocks:])
+        result._len = length
+        if length:
+            result._last = result._block(nblocks - 1)[-1]
+        return result
+
+
+class PrimeGapStatistics:
+    """
+    One-pass prime-gap accumulator. Feed it primes in increasing order,
+    a segment at a time; it keeps a gap histogram, exact per-range
+    count/mean/variance and the maximal-gap records, in memory that does
+    not grow with the number of primes seen. A gap belongs to the prime
+    that starts it, so a range [start, end] covers gaps after primes
+    start <= p <= end.
+    """
+    
+    def __init__(self, ranges: Iterable[Tuple[int, int]] = ()):
+        self.histogram = Counter()
+        self.records: List[Tuple[int, int]] = []  # (gap, prime before it)
+        self.count = 0
+        self.last = None
+        # range -> [gap count, gap sum, sum of squared gaps], all exact ints
+        self._sums = {(start, end): [0, 0, 0] for start, end in ranges}
+    
+    @property
+    def max_gap(self) -> int:
+        return self.records[-1][0] if self.records else 0
+    
+    def update(self, primes: List[int]) -> None:
+        """Consume the next segment of primes (increasing, after all earlier ones)."""
+        if not primes:
+            return
+        seq = primes if self.last is None else [self.last] + primes
+        self.count += len(primes)
+        self.last = seq[-1]
+        gaps = list(map(operator.sub, islice(seq, 1, None), seq))
+        if not gaps:
+            return
+            
+        self.histogram.update(gaps)
+        if max(gaps) > self.max_gap:
+            record = self.max_gap
+            for i, gap in enumerate(gaps):
+                if gap > record:
+                    record = gap
+                    self.records.append((gap, seq[i]))
+                    
+        for (start, end), sums in self._sums.items():
+            lo = bisect_left(seq, start, 0, len(gaps))
+            hi = bisect_right(seq, end, 0, len(gaps))
+            if lo < hi:
+                part = gaps[lo:hi]
+                sums[0] += len(part)
+                sums[1] += sum(part)
+                sums[2] += sum(map(operator.mul, part, part))
+    
+    def range_stats(self) -> Dict[Tuple[int, int], Dict[str, float]]:
+        """Per-range {'count', 'mean', 'variance'} (population variance)."""
+        stats = {}
+        for key, (count, total, squares) in self._sums.items():
+            if count:
+                stats[key] = {'count': count, 'mean': total / count,
+                              'variance': (count * squares - total * total) / (count * count)}
+            else:
+                stats[key] = {'count': 0, 'mean': 0.0, 'variance': 0.0}
+        return stats
+
+
+class SmallestFactorTable:
+    """
+    Smallest-prime-factor table for the odd numbers up to limit, stored
+    as uint32 (a NumPy array when available, else array('I')). Entry i
+    holds the smallest prime factor of 2i + 1, or 0 when it is prime, so
+    factoring any n <= limit is an O(log n) table walk.
+    """
+    
+    def __init__(self, limit: int, use_numpy: Optional[bool] = None):
+        if limit >= 1 << 32:
+            raise ValueError("SmallestFactorTable entries are 32-bit")
+        self.limit = max(limit, 1)
+        size = (self.limit + 1) // 2
+        if use_numpy is None:
+            use_numpy = np is not None
+        if use_numpy:
+            self.table = np.zeros(size, dtype=np.uint32)
+        else:
+            self.table = array('I', bytes(4 * size))
+        
+        # Striking with the largest primes first leaves the smallest prime
+        # as the final write to every odd composite, one slice per prime
+        for p in reversed(_odd_primes_upto(math.isqrt(self.limit))):
+            start = p * p // 2
+            if use_numpy:
+                self.table[start::p] = p
+            else:
+                self.table[start::p] = array('I', [p]) * len(range(start, size, p))
+    
+    def smallest_factor(self, n: int) -> int:
+        """Smallest prime factor of 2 <= n <= limit."""
+        if n % 2 == 0:
+            return 2
+        return int(self.table[n >> 1]) or n
+    
+    def factor(self, n: int) -> List[int]:
+        """Sorted prime factors of 1 <= n <= limit, with multiplicity."""
+        if n > self.limit:
+            raise ValueError(f"{n} is beyond the table limit {self.limit}")
+        factors = []
+        while n % 2 == 0 and n > 0:
+            factors.append(2)
+            n //= 2
+        table = self.table
+        while n > 1:
+            p = int(table[n >> 1]) or n
+            factors.append(p)
+            n //= p
+        return factors
+
+
+class BoundedCache:
+    """
+    Size-bounded LRU cache keyed by integer, with hit/miss counters.
+    The least recently used entry is evicted once max_entries is reached.
+    """
+    
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+    
+    def get(self, n: int, default=None):
+        """Return the cached value for n (marking it recently used) or default."""
+        try:
+            value = self._entries[n]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(n)
+        self.hits += 1
+        return value
+    
+    def put(self, n: int, value) -> None:
+        """Store a value for n, evicting the least recently used entry if full."""
+        if self.max_entries <= 0:
+            return
+        self._entries[n] = value
+        self._entries.move_to_end(n)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def __contains__(self, n: int) -> bool:
+        return n in self._entries
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = 0
+    
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                'hits': self.hits, 'misses': self.misses}
+
+
+class PrimalityCache(BoundedCache):
+    """
+    BoundedCache for primality results with a dense fast path:
+    n <= dense_limit is answered from a PrimeBitmap and never stored.
+    """
+    
+    def __init__(self, max_entries: int = 4096, dense_limit: int = 1 << 16):
+        super().__init__(max_entries)
+        self.dense = PrimeBitmap(dense_limit) if dense_limit > 0 else None
+    
+    def get(self, n: int, default=None):
+        if self.dense is not None and 0 <= n <= self.dense.limit:
+            self.hits += 1
+            return self.dense.is_prime(n)
+        return super().get(n, default)
+    
+    def put(self, n: int, value: bool) -> None:
+        if self.dense is not None and 0 <= n <= self.dense.limit:
+            return
+        super().put(n, value)
+    
+    def __contains__(self, n: int) -> bool:
+        if self.dense is not None and 0 <= n <= self.dense.limit:
+            return True
+        return super().__contains__(n)
 
 
 class RealPrimeAlgorithms:
     """Collection of actual working prime algorithms."""
     
-    def __init__(self):
-        self.prime_cache = {}
+    # (method, keyword arguments) tried in order on composite cofactors that
+    # survive trial division; each returns a proper factor or None. Small
+    # cofactors take the SQUFOF-then-rho fast path, cheap p-1/p+1 runs catch
+    # factors with smooth p -/+ 1, the bounded rho run catches small
+    # factors, ECM medium ones, and the final unbounded rho guarantees
+    # termination.
+    FACTOR_TIERS = (
+        ('small_factor', {}),
+        ('pollard_pm1', {'B1': 1000, 'B2': 50000}),
+        ('williams_pp1', {'B1': 1000, 'B2': 50000, 'seeds': (3,)}),
+        ('pollard_rho', {'max_restarts': 2, 'max_steps': 1 << 16}),
+        ('ecm', {}),
+        ('pollard_rho', {}),
+    )
+    
+    def __init__(self, cache_size: int = 4096, dense_limit: int = 1 << 16,
+                 prime_cache: Optional[BoundedCache] = None,
+                 factor_cache: Optional[BoundedCache] = None):
+        # Caches are pluggable; pass instances to share them between objects
+        self.prime_cache = (prime_cache if prime_cache is not None
+                            else PrimalityCache(cache_size, dense_limit))
+        self.factor_cache = (factor_cache if factor_cache is not None
+                             else BoundedCache(cache_size))
+        self._bitmap = None
+        self._spf = None
+    
+    def prime_bitmap(self, limit: int) -> PrimeBitmap:
+        """
+        Shared bit-packed table covering 0..limit.
+        Reused by every sieve-based method until a larger limit is needed.
+        """
+        if self._bitmap is None or self._bitmap.limit < limit:
+            self._bitmap = PrimeBitmap(limit)
+        return self._bitmap
         
+    def spf_table(self, limit: int) -> SmallestFactorTable:
+        """
+        Shared smallest-prime-factor table covering 1..limit. Once built,
+        factor_complete and factor_with_spf answer n <= limit by table walk.
+        """
+        if self._spf is None or self._spf.limit < limit:
+            self._spf = SmallestFactorTable(limit)
+        return self._spf
+
+    def prime_table(self, path: str, limit: int) -> PrimeTable:
+        """
+        Open the on-disk prime table at path, (re)building it first if it
+        is missing, unreadable or does not cover 0..limit.
+        """
+        if os.path.exists(path):
+            try:
+                table = PrimeTable(path)
+            except ValueError:
+                pass
+            else:
+                if table.limit >= limit:
+                    return table
+                table.close()
+        return PrimeTable.build(path, limit)
+
+    def factor_with_spf(self, n: int) -> List[int]:
+        """
+        Prime factors of n by walking the smallest-prime-factor table,
+        building (or growing) the table to n if it does not cover n yet.
+        Call spf_table(N) once up front when factoring everything <= N.
+        Time complexity: O(log n) per call once the table exists
+        """
+        if n < 2:
+            return []
+        return self.spf_table(n).factor(n)
+    
     def sieve_of_eratosthenes(self, n: int) -> List[int]:
         """
         Generate all primes up to n.
         Time complexity: O(n log log n)
-        Space complexity: O(n)
+        Space complexity: O(n) bits, plus the returned list
         """
         if n < 2:
             return []
             
-        sieve = [True] * (n + 1)
-        sieve[0] = sieve[1] = False
-        
-        for i in range(2, int(math.sqrt(n)) + 1):
+        return list(self.prime_bitmap(n).primes(0, n + 1))
+    
+    def sieve_numpy(self, n: int) -> 'np.ndarray':
+        """
+        Generate all primes up to n as an int64 NumPy array.
+        Odds-only; composites are struck with strided slice assignment, so
+        the interpreter runs one iteration per base prime, not per multiple.
+        Time complexity: O(n log log n)
+        """
+        if np is None:
+            raise ImportError("sieve_numpy requires NumPy")
+        if n < 2:
+            return np.empty(0, dtype=np.int64)
+            
+        # sieve[i] stands for the odd number 2i + 1
+        sieve = np.ones((n + 1) // 2, dtype=np.bool_)
+        sieve[0] = False
+        for i in range(1, (math.isqrt(n) - 1) // 2 + 1):
             if sieve[i]:
-                for j in range(i * i, n + 1, i):
-                    sieve[j] = False
+                p = 2 * i + 1
+                sieve[p * p // 2::p] = False
+                
+        primes = 2 * np.flatnonzero(sieve).astype(np.int64) + 1
+        return np.concatenate((np.array([2], dtype=np.int64), primes))
+    
+    def segmented_sieve(self, n: int, start: int = 0,
+                        segment_size: int = SEGMENT_SIZE) -> Iterator[List[int]]:
+        """
+        Yield the primes in [start, n] one cache-sized window at a time.
+        Only the base primes up to √n stay resident, so memory is
+        O(√n / log n + segment_size) regardless of n.
+        Time complexity: O(n log log n)
+        """
+        if n < 2:
+            return
+        lo = max(start, 2)
+        base_primes = _odd_primes_upto(math.isqrt(n))
+        span = 2 * segment_size
+        
+        while lo <= n:
+            hi = min(lo + span, n + 1)
+            yield _segment_primes(lo, hi, base_primes)
+            lo = hi
+    
+    def prime_array(self, n: int, start: int = 0,
+                    segment_size: int = SEGMENT_SIZE) -> PrimeArray:
+        """
+        The primes in [start, n] as a compact PrimeArray, filled one
+        segment at a time so no full prime list is ever materialized.
+        """
+        primes = PrimeArray()
+        for segment in self.segmented_sieve(n, start, segment_size):
+            primes.extend(segment)
+        return primes
+    
+    def iter_primes(self, start: int = 0,
+                    segment_size: int = SEGMENT_SIZE) -> Iterator[int]:
+        """
+        Yield every prime >= start in increasing order, with no upper bound.
+        Windows are sieved lazily and the base primes grow with them, so
+        memory stays O(√n) for the largest n reached. Combine with
+        itertools.takewhile/islice to stop on any condition.
+        """
+        lo = max(start, 0)
+        base_limit = 0
+        base_primes = []
+        
+        while True:
+            # Windows never shrink below √hi, so each base prime hits each
+            # window at most a few times even far out on the number line
+            hi = lo + max(2 * segment_size, math.isqrt(lo) + 1)
+            needed = math.isqrt(hi - 1)
+            if needed > base_limit:
+                base_limit = max(needed, 2 * base_limit)
+                base_primes = _odd_primes_upto(base_limit)
+            yield from _segment_primes(lo, hi, base_primes)
+            lo = hi
+    
+    def prime_tuples(self, pattern='twin', start: int = 0, stop: Optional[int] = None,
+                     segment_size: int = SEGMENT_SIZE) -> Iterator[Tuple[int, ...]]:
+        """
+        Yield prime constellations (p, p + o1, ..., p + ok) with
+        start <= p < stop, in increasing order of p. pattern is a name from
+        PRIME_PATTERNS or a sequence of offsets; stop=None runs unbounded.
+        Candidates are restricted to the wheel residues mod 2310 that admit
+        the pattern, then checked against segmented sieve windows.
+        Raises ValueError for unknown names and inadmissible patterns.
+        """
+        if isinstance(pattern, str):
+            if pattern not in PRIME_PATTERNS:
+                raise ValueError(f"Unknown prime pattern: {pattern!r}")
+            pattern = PRIME_PATTERNS[pattern]
+        offsets = tuple(sorted({o - min(pattern) for o in pattern}))
+        if not _is_admissible(offsets):
+            raise ValueError(f"Pattern {offsets} is not admissible")
+            
+        # Members at or below the wheel primes would be rejected by the
+        # residue filter, so check that short stretch directly
+        lo = max(start, 0)
+        wheel_end = _TUPLE_WHEEL_PRIMES[-1] + 1
+        for p in range(lo, wheel_end if stop is None else min(stop, wheel_end)):
+            if all(_is_prime(p + o) for o in offsets):
+                yield tuple(p + o for o in offsets)
+                
+        residues = _tuple_residues(offsets)
+        lo = max(lo, wheel_end) // _TUPLE_WHEEL * _TUPLE_WHEEL
+        base_limit = 0
+        base_primes = []
+        
+        while stop is None or lo < stop:
+            span = max(2 * segment_size, math.isqrt(lo) + 1)
+            hi = lo + -(-span // _TUPLE_WHEEL) * _TUPLE_WHEEL
+            needed = math.isqrt(hi + offsets[-1])
+            if needed > base_limit:
+                base_limit = max(needed, 2 * base_limit)
+                base_primes = _odd_primes_upto(base_limit)
+            for p in _tuple_window(lo, hi, offsets, residues, base_primes):
+                if stop is not None and p >= stop:
+                    return
+                if p >= max(start, wheel_end):
+                    yield tuple(p + o for o in offsets)
+            lo = hi
+    
+    def parallel_sieve(self, lo: int, hi: int, workers: Optional[int] = None,
+                       chunk_size: int = 1 << 22,
+                       segment_size: int = SEGMENT_SIZE) -> Iterator[int]:
+        """
+        Yield the primes in [lo, hi) in increasing order, sieving chunks of
+        chunk_size integers across a process pool. At most 2 * workers
+        chunks are in flight, so memory stays bounded for any range.
+        """
+        workers = workers or os.cpu_count() or 1
+        tasks = ((a, b, segment_size) for a, b in _chunk_bounds(max(lo, 0), hi, chunk_size))
+        with ProcessPoolExecutor(workers, initializer=_init_sieve_worker,
+                                 initargs=(hi - 1,)) as executor:
+            for primes in _ordered_pool_map(executor, _sieve_chunk_primes,
+                                            tasks, 2 * workers):
+                yield from primes
+    
+    def parallel_prime_stats(self, lo: int, hi: int, workers: Optional[int] = None,
+                             chunk_size: int = 1 << 22,
+                             segment_size: int = SEGMENT_SIZE) -> Dict:
+        """
+        Count the primes in [lo, hi) and histogram their gaps across a
+        process pool. Workers return only aggregates, never prime lists;
+        gaps that straddle chunk boundaries are stitched here.
+        Returns {'count', 'first', 'last', 'gaps': {gap: occurrences}}.
+        """
+        workers = workers or os.cpu_count() or 1
+        tasks = ((a, b, segment_size) for a, b in _chunk_bounds(max(lo, 0), hi, chunk_size))
+        count = 0
+        first = last = None
+        gaps = defaultdict(int)
+        
+        with ProcessPoolExecutor(workers, initializer=_init_sieve_worker,
+                                 initargs=(hi - 1,)) as executor:
+            for chunk in _ordered_pool_map(executor, _sieve_chunk_stats,
+                                           tasks, 2 * workers):
+                chunk_count, chunk_first, chunk_last, chunk_gaps = chunk
+                if chunk_count == 0:
+                    continue
+                if last is None:
+                    first = chunk_first
+                else:
+                    gaps[chunk_first - last] += 1
+                for gap, occurrences in chunk_gaps.items():
+                    gaps[gap] += occurrences
+                count += chunk_count
+                last = chunk_last
+                
+        return {'count': count, 'first': first, 'last': last, 'gaps': dict(gaps)}
+    
+    def record_gaps(self, lo: int, hi: int, workers: Optional[int] = None,
+                    chunk_size: int = 1 << 26, segment_size: int = SEGMENT_SIZE,
+                    checkpoint: Optional[str] = None) -> Dict:
+        """
+        Search [lo, hi) for maximal prime gaps, i.e. gaps larger than every
+        earlier gap in the range, plus the first occurrence of every gap
+        size. Chunks are sieved across a process pool; gaps straddling
+        chunk boundaries are stitched in order here. With checkpoint set
+        to a file path, progress is saved as JSON after every chunk, and a
+        later call with the same lo/hi resumes from it.
+        Returns {'records': [{'gap', 'start', 'end', 'merit'}, ...],
+        'first_occurrences': {gap: p}, 'last': last prime seen}; merit
+        is gap / ln(start).
+        """
+        workers = workers or os.cpu_count() or 1
+        state = {'lo': lo, 'hi': hi, 'next': max(lo, 0), 'last': None,
+                 'records': [], 'first_occurrences': {}}
+        if checkpoint and os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                saved = json.load(f)
+            if saved['lo'] == lo and saved['hi'] == hi:
+                state = saved
+                state['first_occurrences'] = {int(g): p for g, p in
+                                              saved['first_occurrences'].items()}
+                
+        records = state['records']
+        first_occurrences = state['first_occurrences']
+        last = state['last']
+        max_gap = records[-1][0] if records else 0
+        starts = range(state['next'], hi, chunk_size)
+        tasks = ((start, min(start + chunk_size, hi), segment_size) for start in starts)
+        
+        with ProcessPoolExecutor(workers, initializer=_init_sieve_worker,
+                                 initargs=(hi - 1,)) as executor:
+            results = _ordered_pool_map(executor, _gap_chunk_scan, tasks, 2 * workers)
+            for start, (first, chunk_last, chunk_records, chunk_firsts) in zip(starts, results):
+                if first is not None:
+                    candidates = chunk_records
+                    if last is not None:
+                        first_occurrences.setdefault(first - last, last)
+                        candidates = [(first - last, last)] + chunk_records
+                    for gap, p in chunk_firsts.items():
+                        first_occurrences.setdefault(gap, p)
+                    for gap, p in candidates:
+                        if gap > max_gap:
+                            max_gap = gap
+                            records.append([gap, p])
+                    last = chunk_last
                     
-        return [i for i in range(2, n + 1) if sieve[i]]
+                if checkpoint:
+                    state.update(next=min(start + chunk_size, hi), last=last)
+                    with open(checkpoint + '.tmp', 'w') as f:
+                        json.dump(state, f)
+                    os.replace(checkpoint + '.tmp', checkpoint)
+                    
+        return {
+            'records': [{'gap': gap, 'start': p, 'end': p + gap,
+                         'merit': gap / math.log(p)} for gap, p in records],
+            'first_occurrences': dict(sorted(first_occurrences.items())),
+            'last': last,
+        }
+    
+    def prime_count(self, x: int, workers: int = 1,
+                    segment_size: int = 1 << 20) -> int:
+        """
+        π(x), the number of primes <= x, by the Meissel-Lehmer method:
+        π(x) = φ(x, a) + a - 1 - P2(x, a) with a = π(x^(1/3)).
+        φ(x, a) is expanded down to the cached periodic φ table or to
+        leaves φ(v, b) = 1 + π(v) - b with v below x^(2/3); those leaf
+        values and the π(x / p) of P2 are then all answered by a single
+        segmented sieve sweep up to about x^(2/3). With workers > 1 the
+        sweep is split across a process pool.
+        Time complexity: about O(x^(2/3)) time and O(x^(1/2)) memory
+        """
+        if x < 2:
+            return 0
+        if x < 1 << 16:
+            return 1 + _odd_segment_flags(0, x + 1, _odd_primes_upto(math.isqrt(x))).count(1)
+            
+        root = math.isqrt(x)
+        small_primes = [2] + _odd_primes_upto(root)
+        a = bisect_right(small_primes, _icbrt(x))
+        constant, weights = _phi_leaves(x, small_primes[:a])
+        
+        # P2 = sum over x^(1/3) < p_i <= x^(1/2) of π(x / p_i) - (i - 1),
+        # with p_i = small_primes[i - 1]
+        for i in range(a + 1, len(small_primes) + 1):
+            weights[x // small_primes[i - 1]] -= 1
+            constant += i - 1
+        total = constant + a - 1
+        
+        # Resolve every π(v) in one ordered sweep
+        points = sorted(v for v, w in weights.items() if w)
+        limit = points[-1] + 1 if points else 3
+        bounds = list(_chunk_bounds(0, limit, max(-(-limit // (8 * workers)), 2 * segment_size)))
+        tasks = [(lo, hi, points[bisect_left(points, lo):bisect_left(points, hi)], segment_size)
+                 for lo, hi in bounds]
+        if workers > 1:
+            with ProcessPoolExecutor(workers, initializer=_init_sieve_worker,
+                                     initargs=(limit - 1,)) as executor:
+                results = list(executor.map(_prime_count_chunk, tasks))
+        else:
+            base_primes = _odd_primes_upto(math.isqrt(limit - 1))
+            results = (_count_odd_primes_at(lo, hi, chunk_points, base_primes, segment_size)
+                       for lo, hi, chunk_points, segment_size in tasks)
+            
+        below = 1  # the prime 2
+        for (_, _, chunk_points, _), (chunk_total, counts) in zip(tasks, results):
+            for v, count in zip(chunk_points, counts):
+                total += weights[v] * (below + count)
+            below += chunk_total
+        return total
+    
+    def nth_prime(self, k: int, workers: int = 1) -> int:
+        """
+        The k-th prime (nth_prime(1) == 2). The inverse of the Riemann R
+        estimate gives a point x close to p_k; π(x) is computed exactly
+        with prime_count and only the short stretch between x and p_k is
+        sieved, forwards or backwards. Memory stays O(√p_k).
+        """
+        if k < 1:
+            raise ValueError("k must be a positive integer")
+        if k < 1 << 16:
+            # p_k < k (ln k + ln ln k) for k >= 6
+            bound = int(k * (math.log(k) + math.log(math.log(k)))) + 1 if k >= 6 else 12
+            return self.prime_bitmap(bound).nth_prime(k)
+            
+        x = _inverse_prime_count_estimate(k)
+        count = self.prime_count(x, workers)
+        if count < k:
+            return next(islice(self.iter_primes(x + 1), k - count - 1, None))
+            
+        # p_k is the (count - k + 1)-th prime at or below x, counting down
+        needed = count - k + 1
+        base_primes = _odd_primes_upto(math.isqrt(x))
+        span = max(2 * SEGMENT_SIZE, math.isqrt(x))
+        hi = x + 1
+        while True:
+            lo = max(hi - span, 0)
+            primes = _segment_primes(lo, hi, base_primes)
+            if len(primes) >= needed:
+                return primes[-needed]
+            needed -= len(primes)
+            hi = lo
     
     def is_prime_trial(self, n: int) -> bool:
         """
         Check if n is prime using trial division.
         Time complexity: O(√n)
         """
-        if n in self.prime_cache:
-            return self.prime_cache[n]
+        cached = self.prime_cache.get(n)
+        if cached is not None:
+            return cached
             
         if n < 2:
             result = False
@@ -58,21 +2280,87 @@ class RealPrimeAlgorithms:
                     result = False
                     break
                     
-        self.prime_cache[n] = result
+        self.prime_cache.put(n, result)
+        return result
+    
+    def is_prime(self, n: int) -> bool:
+        """
+        Deterministic primality test, selected by size:
+        trial division by small primes, then Miller-Rabin with a proven
+        witness set for n < 2^64, then Baillie-PSW (strong base-2 plus
+        strong Lucas) above that. BPSW has no known counterexample.
+        Time complexity: O(log³ n)
+        """
+        cached = self.prime_cache.get(n)
+        if cached is not None:
+            return cached
+        result = _is_prime(n)
+        self.prime_cache.put(n, result)
         return result
     
-    def miller_rabin(self, n: int, k: int = 5) -> bool:
+    def is_prime_many(self, values: Iterable[int],
+                      chunk_size: int = 1 << 16) -> 'np.ndarray':
+        """
+        Deterministic primality of many integers in [0, 2^64) at once.
+        Accepts a NumPy uint64 array, an array('Q') or any iterable of ints
+        and returns a boolean mask. Candidates are first rejected by a
+        vectorized small-prime pre-sieve; survivors below 2^63 then run
+        Montgomery-form Miller-Rabin in bulk with the witness set of
+        is_prime. Survivors >= 2^63 fall back to is_prime one by one.
+        Without NumPy this returns a list of bools.
+        """
+        if np is None:
+            return [self.is_prime(int(n)) for n in values]
+            
+        if isinstance(values, (np.ndarray, array, Sequence)):
+            values = np.asarray(values, dtype=np.uint64).ravel()
+        else:
+            # Generators, iterators, sets, ...: asarray cannot size these
+            values = np.fromiter(values, dtype=np.uint64)
+        mask = np.zeros(values.shape, dtype=np.bool_)
+        limit_63 = np.uint64(1 << 63)
+        
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start:start + chunk_size]
+            candidate = chunk >= 2
+            for p in _SMALL_PRIMES:
+                candidate &= (chunk % np.uint64(p) != 0) | (chunk == p)
+            small = chunk < 101 * 101
+            result = candidate & small
+            
+            survivors = np.flatnonzero(candidate & ~small & (chunk < limit_63))
+            if len(survivors):
+                n = chunk[survivors]
+                largest = int(n.max())
+                bases = next(b for bound, b in _MR_WITNESSES if largest < bound)
+                result[survivors] = _miller_rabin_batch(n, bases)
+                
+            for i in np.flatnonzero(candidate & (chunk >= limit_63)):
+                result[i] = self.is_prime(int(chunk[i]))
+            mask[start:start + chunk_size] = result
+            
+        return mask
+    
+    def miller_rabin(self, n: int, k: int = 5, deterministic: bool = False) -> bool:
         """
         Miller-Rabin primality test (probabilistic).
         Time complexity: O(k log³ n)
         False positive rate: at most 4^(-k)
+        With deterministic=True, defers to is_prime (exact below 2^64,
+        BPSW above) and ignores k. Only proven results are cached: a
+        composite verdict always, a prime verdict only when deterministic.
         """
+        if deterministic:
+            return self.is_prime(n)
         if n < 2:
             return False
         if n == 2 or n == 3:
             return True
         if n % 2 == 0:
             return False
+        cached = self.prime_cache.get(n)
+        if cached is not None:
+            return cached
             
         # Write n-1 as 2^r * d
         r, d = 0, n - 1
@@ -93,70 +2381,553 @@ class RealPrimeAlgorithms:
                 if x == n - 1:
                     break
             else:
+                self.prime_cache.put(n, False)
                 return False
                 
         return True
     
-    def pollard_rho(self, n: int) -> Optional[int]:
+    def pollard_rho(self, n: int, max_restarts: int = 20, batch: int = 100,
+                    max_steps: Optional[int] = None) -> Optional[int]:
         """
-        Pollard's rho algorithm for factorization.
+        Pollard's rho algorithm for factorization, with Brent's cycle
+        detection. Differences are multiplied together and one gcd is
+        taken per `batch` steps; if a batch collapses to n it is replayed
+        step by step, and a failed run (or one exceeding max_steps
+        iterations) re-seeds with a fresh c.
+        Expected time: O(n^(1/4))
+        Returns a non-trivial factor, or None if n is prime or every
+        restart failed.
+        """
+        if n % 2 == 0:
+            return 2 if n > 2 else None
+        if n < 9 or self.is_prime(n):
+            return None
+            
+        for _ in range(max_restarts):
+            y = random.randrange(1, n)
+            c = random.randrange(1, n)
+            g = r = q = 1
+            
+            while g == 1:
+                if max_steps is not None and r > max_steps:
+                    break
+                x = y
+                for _ in range(r):
+                    y = (y * y + c) % n
+                k = 0
+                while k < r and g == 1:
+                    ys = y
+                    for _ in range(min(batch, r - k)):
+                        y = (y * y + c) % n
+                        q = q * abs(x - y) % n
+                    g = math.gcd(q, n)
+                    k += batch
+                r *= 2
+                
+            if g == 1:
+                continue
+            if g == n:
+                # The batch overshot: replay it one gcd at a time
+                g = 1
+                while g == 1:
+                    ys = (ys * ys + c) % n
+                    g = math.gcd(abs(x - ys), n)
+            if g != n:
+                return g
+                
+        return None
+    
+    def squfof(self, n: int, multipliers: Tuple[int, ...] = _SQUFOF_MULTIPLIERS) -> Optional[int]:
+        """
+        Shanks' square forms factorization, cycling through the given
+        multipliers (by default all of _SQUFOF_MULTIPLIERS). Designed for
+        n below 2^62, where its iteration count is tightly bounded.
         Expected time: O(n^(1/4))
         Returns a non-trivial factor or None.
         """
         if n % 2 == 0:
-            return 2
+            return 2 if n > 2 else None
+        root = math.isqrt(n)
+        if root * root == n:
+            return root if n > 1 else None
+            
+        for k in multipliers:
+            kn = k * n
+            P0 = math.isqrt(kn)
+            Q = kn - P0 * P0
+            if Q == 0:
+                continue
+            P = Pprev = P0
+            Qprev = 1
+            bound = 6 * math.isqrt(2 * math.isqrt(kn))
             
-        x = random.randint(2, n - 1)
-        y = x
-        c = random.randint(1, n - 1)
-        d = 1
+            # Forward cycle until Q is a square at an even step
+            for i in range(2, bound):
+                b = (P0 + P) // Q
+                P = b * Q - P
+                q = Q
+                Q = Qprev + b * (Pprev - P)
+                r = math.isqrt(Q)
+                if i % 2 == 0 and r * r == Q:
+                    break
+                Qprev = q
+                Pprev = P
+            else:
+                continue
+                
+            # Reverse cycle from the square form until P repeats
+            b = (P0 - P) // r
+            Pprev = P = b * r + P
+            Qprev = r
+            Q = (kn - Pprev * Pprev) // Qprev
+            while True:
+                b = (P0 + P) // Q
+                Pprev = P
+                P = b * Q - P
+                q = Q
+                Q = Qprev + b * (Pprev - P)
+                Qprev = q
+                if P == Pprev:
+                    break
+                    
+            g = math.gcd(n, Qprev)
+            if 1 < g < n:
+                return g
+                
+        return None
+    
+    def hart_one_line(self, n: int, max_iterations: Optional[int] = None) -> Optional[int]:
+        """
+        Hart's one-line factoring: for i = 1, 2, ..., s = ⌈√(n i)⌉ and
+        look for s^2 mod n being a square t^2, then gcd(s - t, n).
+        Quick when n has factors of similar size or a small ratio.
+        Expected time: O(n^(1/3))
+        Returns a non-trivial factor or None.
+        """
+        if n % 2 == 0:
+            return 2 if n > 2 else None
+        if max_iterations is None:
+            max_iterations = int(round(n ** (1 / 3))) + 1
+            
+        for i in range(1, max_iterations + 1):
+            s = math.isqrt(n * i)
+            if s * s != n * i:
+                s += 1
+            m = s * s % n
+            t = math.isqrt(m)
+            if t * t == m:
+                g = math.gcd(s - t, n)
+                if 1 < g < n:
+                    return g
+        return None
+    
+    def small_factor(self, n: int) -> Optional[int]:
+        """
+        Size-based dispatcher for cofactors below SMALL_FACTOR_LIMIT:
+        SQUFOF with its first few multipliers, then Pollard rho, so a
+        missed square form never costs a full multiplier cycle.
+        Returns None straight away for larger n.
+        """
+        if n >= SMALL_FACTOR_LIMIT or n < 4:
+            return None
+        d = self.squfof(n, _SQUFOF_MULTIPLIERS[:_SMALL_FACTOR_SQUFOF_MULTIPLIERS])
+        return d or self.pollard_rho(n)
+    
+    def pollard_pm1(self, n: int, B1: int = 10000,
+                    B2: Optional[int] = None) -> Optional[int]:
+        """
+        Pollard's p-1 method: finds p when p - 1 is B1-smooth apart from
+        one prime up to B2 (default 100 * B1). Stage 1 raises 2 to every
+        prime power <= B1 from a memoized prime table, one pow() per
+        batch of primes; stage 2 is a baby-step/giant-step continuation.
+        Returns a non-trivial factor or None.
+        """
+        if n % 2 == 0:
+            return 2 if n > 2 else None
+        if n < 9:
+            return None
+        B2 = max(B2 or 100 * B1, B1)
+        primes = _primes_upto_cached(B2)
+        stage1 = primes[:bisect_right(primes, B1)]
         
-        while d == 1:
-            x = (x * x + c) % n
-            y = (y * y + c) % n
-            y = (y * y + c) % n
-            d = math.gcd(abs(x - y), n)
+        a = 2
+        for i in range(0, len(stage1), 256):
+            batch = [_prime_power_upto(p, B1) for p in stage1[i:i + 256]]
+            previous = a
+            a = pow(a, math.prod(batch), n)
+            g = math.gcd(a - 1, n)
+            if g == n:
+                # Every factor fell out in this batch: redo it prime by prime
+                a = previous
+                for power in batch:
+                    a = pow(a, power, n)
+                    g = math.gcd(a - 1, n)
+                    if g != 1:
+                        break
+            if g != 1:
+                return g if g != n else None
+                
+        g = math.gcd(a, n)
+        if g != 1:
+            return g if g != n else None
+        g = _lucas_stage2((a + pow(a, -1, n)) % n, n, B1, B2, primes)
+        return g if 1 < g < n else None
+    
+    def williams_pp1(self, n: int, B1: int = 10000, B2: Optional[int] = None,
+                     seeds: Tuple[int, ...] = (3, 5, 7)) -> Optional[int]:
+        """
+        Williams' p+1 method: finds p when p + 1 is B1-smooth apart from
+        one prime up to B2 (default 100 * B1). Works on Lucas sequences
+        V_k(seed); a seed only exposes p + 1 when seed^2 - 4 is a
+        non-residue mod p, so several seeds are tried. Stage 2 is the same
+        baby-step/giant-step continuation as pollard_pm1.
+        Returns a non-trivial factor or None.
+        """
+        if n % 2 == 0:
+            return 2 if n > 2 else None
+        if n < 9:
+            return None
+        B2 = max(B2 or 100 * B1, B1)
+        primes = _primes_upto_cached(B2)
+        stage1 = primes[:bisect_right(primes, B1)]
+        
+        for seed in seeds:
+            v = seed % n
+            for p in stage1:
+                v = _lucas_v(_prime_power_upto(p, B1), v, n)
+            g = math.gcd(v - 2, n)
+            if 1 < g < n:
+                return g
+            if g == n:
+                continue
+            g = _lucas_stage2(v, n, B1, B2, primes)
+            if 1 < g < n:
+                return g
+                
+        return None
+    
+    def ecm(self, n: int, B1: Optional[int] = None, B2: Optional[int] = None,
+            curves: Optional[int] = None, workers: int = 1,
+            seed: Optional[int] = None) -> Optional[int]:
+        """
+        Lenstra's elliptic-curve method on Montgomery curves.
+        Each curve runs stage 1 to B1 and stage 2 to B2 (default 100 * B1).
+        Without B1, walks the _ECM_LEVELS table (15-, 20-, 25-digit
+        factors, ...) until it covers half the digits of n. With
+        workers > 1 the curves of each level run on a process pool; the
+        first factor found drops the queued curves and signals the running
+        ones to stop, and the pool is shut down before returning.
+        Expected time: exp(√(2 ln p ln ln p)) for the smallest factor p.
+        Returns a non-trivial factor or None.
+        """
+        if n % 2 == 0:
+            return 2 if n > 2 else None
+        if n < 9 or self.is_prime(n):
+            return None
             
-        return d if d != n else None
+        if B1 is not None:
+            levels = [(B1, curves or 100)]
+        else:
+            # Every level up to the first that covers half the digits of n
+            digits = len(str(n))
+            levels = []
+            for factor_digits, b1, count in _ECM_LEVELS:
+                levels.append((b1, count))
+                if factor_digits >= digits // 2:
+                    break
+        rng = random.Random(seed)
+        
+        for b1, count in levels:
+            b2 = B2 or 100 * b1
+            sigmas = [rng.randrange(6, n - 1) for _ in range(count)]
+            if workers <= 1:
+                for sigma in sigmas:
+                    d = _ecm_curve(n, sigma, b1, b2)
+                    if d:
+                        return d
+                continue
+                
+            cancel = multiprocessing.Event()
+            executor = ProcessPoolExecutor(workers, initializer=_init_ecm_worker,
+                                           initargs=(cancel,))
+            try:
+                futures = [executor.submit(_ecm_curve, n, sigma, b1, b2)
+                           for sigma in sigmas]
+                for future in as_completed(futures):
+                    d = future.result()
+                    if d:
+                        return d
+            finally:
+                cancel.set()
+                executor.shutdown(wait=True, cancel_futures=True)
+                
+        return None
+    
+    def siqs(self, n: int, workers: int = 1, verbose: bool = False,
+             families_per_task: int = 2, seed: int = 0,
+             max_rounds: int = 8) -> Optional[int]:
+        """
+        Self-initializing quadratic sieve for semiprimes of roughly
+        40-90 digits. n below SMALL_FACTOR_LIMIT goes to small_factor and
+        perfect powers are split by their root, since the sieve cannot
+        produce anything but trivial squares for them. It builds a factor base for a Knuth-Schroeppel
+        multiple kn and switches polynomials with a Gray code. It sieves
+        with rounded log2 weights and keeps single-large-prime partials.
+        Relations can be collected across a process pool (workers > 1).
+        A structured GF(2) elimination then combines relations into
+        squares. With verbose=True it prints relations/s as it goes.
+        Requires NumPy.
+        Expected time: exp(√(ln n ln ln n))
+        Returns a non-trivial factor, or None if n is prime or max_rounds
+        rounds of linear algebra found only trivial squares.
+        """
+        if np is None:
+            raise ImportError("siqs requires NumPy")
+        if n % 2 == 0:
+            return 2 if n > 2 else None
+        if n < 9 or self.is_prime(n):
+            return None
+        if n < SMALL_FACTOR_LIMIT:
+            return self.small_factor(n)
+        root = _perfect_power_root(n)
+        if root is not None:
+            return root
+        for p in _TRIAL_PRIMES:
+            if n % p == 0:
+                return p
+                
+        k = _siqs_multiplier(n)
+        kn = k * n
+        digits = len(str(kn))
+        fb_size, M, slack = next(((f, m, s) for d, f, m, s in _SIQS_PARAMETERS
+                                  if digits <= d), _SIQS_PARAMETERS[-1][1:])
+        
+        # Factor base: primes p with kn a square mod p, with sqrt(kn) mod p
+        factor_base = []
+        for p in self.iter_primes():
+            residue = kn % p
+            if p == 2 or residue == 0:
+                factor_base.append((p, residue))
+            elif pow(residue, (p - 1) // 2, p) == 1:
+                factor_base.append((p, _sqrt_mod_prime(residue, p)))
+            if len(factor_base) >= fb_size:
+                break
+        column = {p: i + 1 for i, (p, _) in enumerate(factor_base)}
+        column[-1] = 0
+        ncols = len(factor_base) + 1
+        needed = ncols + 32
+        
+        relations = {}  # u -> (exponents, extra square root)
+        partials = {}   # large prime -> (u, exponents)
+        combined = polynomials = 0
+        started = last_report = time.time()
+        task_seed = seed * 1000003
+        
+        def next_task():
+            nonlocal task_seed
+            task_seed += 1
+            return task_seed, families_per_task
+        
+        def absorb(result):
+            nonlocal combined, polynomials, last_report
+            full, partial, sieved = result
+            polynomials += sieved
+            for u, exponents in full:
+                relations.setdefault(u, (exponents, 1))
+            for large, u, exponents in partial:
+                other = partials.setdefault(large, (u, exponents))
+                if other[0] != u:
+                    merged = defaultdict(int, exponents)
+                    for p, e in other[1].items():
+                        merged[p] += e
+                    if relations.setdefault(u * other[0] % n, (dict(merged), large))[1] == large:
+                        combined += 1
+            now = time.time()
+            if verbose and now - last_report >= 5:
+                last_report = now
+                print(f"SIQS: {len(relations)}/{needed} relations "
+                      f"({combined} from partials), {polynomials} polynomials, "
+                      f"{len(relations) / (now - started):.1f} rel/s")
+        
+        initargs = (n, kn, factor_base, M, slack)
+        for _ in range(max_rounds):
+            if workers <= 1:
+                _init_siqs_worker(*initargs)
+                while len(relations) < needed:
+                    absorb(_siqs_collect(next_task()))
+            else:
+                with ProcessPoolExecutor(workers, initializer=_init_siqs_worker,
+                                         initargs=initargs) as executor:
+                    pending = {executor.submit(_siqs_collect, next_task())
+                               for _ in range(2 * workers)}
+                    while len(relations) < needed:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            absorb(future.result())
+                            pending.add(executor.submit(_siqs_collect, next_task()))
+                    for future in pending:
+                        future.cancel()
+                        
+            if verbose:
+                elapsed = time.time() - started
+                print(f"SIQS: {len(relations)} relations in {elapsed:.1f}s "
+                      f"({len(relations) / elapsed:.1f} rel/s), solving "
+                      f"{len(relations)} x {ncols} matrix")
+                
+            # Squares from GF(2) dependencies of the exponent vectors
+            items = list(relations.items())
+            vectors = []
+            for u, (exponents, _) in items:
+                vector = 0
+                for p, e in exponents.items():
+                    if e % 2:
+                        vector |= 1 << column[p]
+                vectors.append(vector)
+                
+            for dependency in _gf2_dependencies(vectors, ncols):
+                x = y = 1
+                total = defaultdict(int)
+                index = 0
+                while dependency:
+                    if dependency & 1:
+                        u, (exponents, extra) = items[index]
+                        x = x * u % n
+                        y = y * extra % n
+                        for p, e in exponents.items():
+                            total[p] += e
+                    dependency >>= 1
+                    index += 1
+                for p, e in total.items():
+                    if p > 0:
+                        y = y * pow(p, e // 2, n) % n
+                g = math.gcd(x - y, n)
+                if 1 < g < n:
+                    return g
+                    
+            needed = len(relations) + 32
+        return None
     
     def factor_complete(self, n: int) -> List[int]:
         """
-        Complete factorization using trial division.
-        Returns list of prime factors.
+        Complete factorization, returned as the sorted multiset of prime
+        factors. Tiers: trial division by a prime table up to
+        TRIAL_DIVISION_LIMIT, a deterministic primality check on the
+        cofactor, then the methods in FACTOR_TIERS, recursing on every
+        factor found.
         """
         if n < 2:
             return []
+        if self._spf is not None and n <= self._spf.limit:
+            return self._spf.factor(n)
+        cached = self.factor_cache.get(n)
+        if cached is not None:
+            return list(cached)
             
+        original = n
         factors = []
         
-        # Check for small factors
-        for p in [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31]:
+        for p in _TRIAL_PRIMES:
+            if p * p > n:
+                break
             while n % p == 0:
                 factors.append(p)
                 n //= p
                 
-        # Check remaining factors
-        i = 37
-        while i * i <= n:
-            while n % i == 0:
-                factors.append(i)
-                n //= i
-            i += 2
-            
         if n > 1:
-            factors.append(n)
-            
+            if n < TRIAL_DIVISION_LIMIT ** 2:
+                factors.append(n)
+            else:
+                factors += self._factor_cofactor(n)
+                
+        factors.sort()
+        self.factor_cache.put(original, tuple(factors))
         return factors
     
+    def _factor_cofactor(self, n: int) -> List[int]:
+        """Split n (free of small prime factors) into primes using FACTOR_TIERS."""
+        factors = []
+        pending = [n]
+        
+        while pending:
+            m = pending.pop()
+            if self.is_prime(m):
+                factors.append(m)
+                continue
+            root = math.isqrt(m)
+            if root * root == m:
+                pending += [root, root]
+                continue
+                
+            for name, options in self.FACTOR_TIERS:
+                d = getattr(self, name)(m, **options)
+                if d and 1 < d < m:
+                    pending += [d, m // d]
+                    break
+            else:
+                raise RuntimeError(f"no factoring tier could split {m}")
+                
+        return factors
+    
+    def factor_many(self, numbers: Iterable[int], workers: Optional[int] = None,
+                    chunksize: int = 64,
+                    ordered: bool = True) -> Iterator[Tuple[int, List[int]]]:
+        """
+        Factor a stream of integers on a process pool, yielding
+        (n, factors) as results arrive, in input order when ordered=True.
+        Inputs are pulled lazily in chunks and at most 2 * workers chunks
+        are in flight, so unbounded input streams use bounded memory.
+        With workers=1 everything runs on the calling process.
+        """
+        workers = workers or os.cpu_count() or 1
+        chunks = _chunked(numbers, chunksize)
+        if workers == 1:
+            for chunk in chunks:
+                for n in chunk:
+                    yield n, self.factor_complete(n)
+            return
+            
+        with ProcessPoolExecutor(workers, initializer=_init_factor_worker) as executor:
+            if ordered:
+                for results in _ordered_pool_map(executor, _factor_chunk,
+                                                 chunks, 2 * workers):
+                    yield from results
+                return
+                
+            pending = set()
+            for chunk in chunks:
+                pending.add(executor.submit(_factor_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+            for future in as_completed(pending):
+                yield from future.result()
+    
+    def gap_statistics(self, limit: int, ranges: Iterable[Tuple[int, int]] = (),
+                       start: int = 0) -> PrimeGapStatistics:
+        """
+        Stream the primes in [start, limit] through a PrimeGapStatistics
+        one sieve window at a time; no prime or gap list is ever built.
+        Time complexity: O(n log log n), memory O(√n + len(ranges))
+        """
+        stats = PrimeGapStatistics(ranges)
+        for segment in self.segmented_sieve(limit, start=start):
+            stats.update(segment)
+        return stats
+    
     def prime_gaps(self, limit: int) -> List[int]:
         """Calculate gaps between consecutive primes."""
-        primes = self.sieve_of_eratosthenes(limit)
-        return [primes[i+1] - primes[i] for i in range(len(primes)-1)]
+        gaps = []
+        previous = None
+        for p in self.prime_bitmap(limit).primes(0, limit + 1):
+            if previous is not None:
+                gaps.append(p - previous)
+            previous = p
+        return gaps
     
     def twin_primes(self, limit: int) -> List[Tuple[int, int]]:
-        """Find twin prime pairs (p, p+2) up to limit."""
-        primes = set(self.sieve_of_eratosthenes(limit))
-        return [(p, p+2) for p in primes if p+2 in primes]
+        """Find twin prime pairs (p, p+2) up to limit, in increasing order."""
+        return list(self.prime_tuples('twin', 0, limit - 1))
     
     def goldbach_partitions(self, n: int) -> List[Tuple[int, int]]:
         """
@@ -166,16 +2937,54 @@ class RealPrimeAlgorithms:
         if n % 2 != 0 or n < 4:
             return []
             
-        primes = set(self.sieve_of_eratosthenes(n))
+        bitmap = self.prime_bitmap(n)
         partitions = []
         
-        for p in primes:
-            if p > n // 2:
-                break
-            if n - p in primes:
+        for p in bitmap.primes(0, n // 2 + 1):
+            if n - p in bitmap:
                 partitions.append((p, n - p))
                 
         return partitions
+    
+    def goldbach_counts(self, limit: int, use_numpy: Optional[bool] = None) -> List[int]:
+        """
+        Goldbach partition counts for every even n <= limit in one pass.
+        counts[n] is the number of unordered pairs p <= q of primes with
+        p + q = n (so counts[n] == len(goldbach_partitions(n))); odd n map
+        to 0. The odd-prime indicator is convolved with itself, by FFT when
+        NumPy is available and by exact big-integer squaring otherwise.
+        Time complexity: O(N log N) with NumPy
+        """
+        if use_numpy is None:
+            use_numpy = np is not None
+        counts = [0] * (max(limit, 0) + 1)
+        if limit < 4:
+            return counts
+        counts[4] = 1
+        
+        # flags[i] marks the odd number 2i + 1; index k of the convolution
+        # collects ordered pairs of odd primes summing to 2k + 2
+        flags = _odd_segment_flags(0, limit - 2, _odd_primes_upto(math.isqrt(limit)))
+        ordered = _self_convolution(bytes(flags), use_numpy)
+        for k in range(2, limit // 2):
+            # Each pair p < q is counted twice, p = q once
+            counts[2 * k + 2] = (ordered[k] + (k % 2 == 0 and flags[k // 2])) // 2
+        return counts
+    
+    def goldbach_minimal_partition(self, n: int) -> Optional[Tuple[int, int]]:
+        """
+        The Goldbach partition (p, n - p) of even n with the smallest p,
+        or None if there is none (which would refute the conjecture).
+        p is found among the first few primes for any n tested so far, so
+        this is fast even for n far beyond any sieve limit.
+        """
+        if n % 2 != 0 or n < 4:
+            raise ValueError("n must be an even integer >= 4")
+        for p in self.iter_primes():
+            if p > n // 2:
+                return None
+            if self.is_prime(n - p):
+                return p, n - p
 
 
 class SimplePrimePredictor:
@@ -302,29 +3111,21 @@ def analyze_prime_gaps():
     print("="*50)
     
     algo = RealPrimeAlgorithms()
-    primes = algo.sieve_of_eratosthenes(10000)
-    gaps = algo.prime_gaps(10000)
+    ranges = [(100, 1000), (1000, 5000), (5000, 10000)]
+    stats = algo.gap_statistics(10000, ranges)
+    total_gaps = stats.count - 1
     
     # Gap distribution
-    gap_count = defaultdict(int)
-    for gap in gaps:
-        gap_count[gap] += 1
-    
     print("\nMost common gaps:")
-    sorted_gaps = sorted(gap_count.items(), key=lambda x: x[1], reverse=True)[:10]
+    sorted_gaps = sorted(stats.histogram.items(), key=lambda x: x[1], reverse=True)[:10]
     for gap, count in sorted_gaps:
-        print(f"Gap {gap:3d}: {count:4d} times ({count/len(gaps)*100:5.1f}%)")
+        print(f"Gap {gap:3d}: {count:4d} times ({count/total_gaps*100:5.1f}%)")
     
     # Average gap growth
     print("\nAverage gap size by range:")
-    ranges = [(100, 1000), (1000, 5000), (5000, 10000)]
-    for start, end in ranges:
-        range_gaps = []
-        for i in range(len(primes)-1):
-            if start <= primes[i] <= end:
-                range_gaps.append(primes[i+1] - primes[i])
-        if range_gaps:
-            avg = sum(range_gaps) / len(range_gaps)
+    for (start, end), range_stats in stats.range_stats().items():
+        if range_stats['count']:
+            avg = range_stats['mean']
             print(f"Primes {start:5d}-{end:5d}: avg gap = {avg:.1f}")
 
 
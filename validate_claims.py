@@ -12,13 +12,15 @@ from typing import List, Tuple, Optional, Dict
 
 def sieve_of_eratosthenes(limit: int) -> List[int]:
     """Generate primes up to limit."""
-    sieve = [True] * (limit + 1)
-    sieve[0] = sieve[1] = False
+    if limit < 2:
+        return []
+        
+    sieve = bytearray(b'\x01') * (limit + 1)
+    sieve[0] = sieve[1] = 0
     
-    for i in range(2, int(math.sqrt(limit)) + 1):
+    for i in range(2, math.isqrt(limit) + 1):
         if sieve[i]:
-            for j in range(i*i, limit + 1, i):
-                sieve[j] = False
+            sieve[i*i::i] = bytes(len(range(i*i, limit + 1, i)))
                 
     return [i for i in range(2, limit + 1) if sieve[i]]
 
@@ -21,16 +21,18 @@ class ValidationFramework:
         self.primes_cache = self._sieve_of_eratosthenes(1000000)
         
     def _sieve_of_eratosthenes(self, limit: int) -> List[int]:
-        """Generate primes up to limit using sieve."""
-        sieve = [True] * (limit + 1)
-        sieve[0] = sieve[1] = False
+        """Generate primes up to limit using a vectorized sieve."""
+        if limit < 2:
+            return []
+            
+        sieve = np.ones(limit + 1, dtype=np.bool_)
+        sieve[:2] = False
         
-        for i in range(2, int(math.sqrt(limit)) + 1):
+        for i in range(2, math.isqrt(limit) + 1):
             if sieve[i]:
-                for j in range(i*i, limit + 1, i):
-                    sieve[j] = False
+                sieve[i*i::i] = False
                     
-        return [i for i in range(2, limit + 1) if sieve[i]]
+        return np.flatnonzero(sieve).tolist()
     
     def is_prime(self, n: int) -> bool:
         """Check if n is prime."""